@@ -0,0 +1,334 @@
+"""Minimal stand-ins for the discord.py objects the cogs touch.
+
+Nothing here talks to Discord. Every call that would be a REST request is
+counted in REST_CALLS under the current benchmark label and can be given an
+artificial latency, so a run shows how many API calls each command costs.
+"""
+import asyncio
+import itertools
+from collections import Counter
+from datetime import timedelta
+import discord
+from benchmarks.fakemongo import LABEL
+
+REST_CALLS = Counter()  # (label, call) -> count
+REST_LATENCY = 0.0      # seconds added to every simulated REST call
+
+_ids = itertools.count(1_100_000_000_000_000_000)
+
+
+def snowflake():
+    return next(_ids)
+
+
+async def _rest(call):
+    REST_CALLS[(LABEL.get(), call)] += 1
+    await asyncio.sleep(REST_LATENCY)
+
+
+class FakeAsset:
+    def __init__(self, url):
+        self.url = url
+
+
+class FakeRole:
+    def __init__(self, guild, name, role_id=None):
+        self.id = role_id or snowflake()
+        self.guild = guild
+        self.name = name
+        self.mention = f"<@&{self.id}>"
+
+    @property
+    def members(self):
+        return [m for m in self.guild.members if self in m.roles]
+
+
+class FakeUser:
+    def __init__(self, user_id=None, name='user', bot=False):
+        self.id = user_id or snowflake()
+        self.name = name
+        self.display_name = name
+        self.global_name = name
+        self.bot = bot
+        self.mention = f"<@{self.id}>"
+        self.avatar = None
+        self.display_avatar = FakeAsset(f"https://cdn.example/avatars/{self.id}.png")
+
+    async def send(self, content=None, **kwargs):
+        await _rest('dm')
+        return FakeMessage(None, self, content)
+
+
+class FakeMember(FakeUser):
+    def __init__(self, guild, name, roles=(), user_id=None, bot=False):
+        super().__init__(user_id, name, bot)
+        self.guild = guild
+        self.roles = [guild.default_role, *roles]
+        self.joined_at = discord.utils.utcnow() - timedelta(days=30)
+
+
+class FakeMessage:
+    def __init__(self, channel, author, content=None, embed=None, message_id=None):
+        self.id = message_id or snowflake()
+        self.channel = channel
+        self.guild = getattr(channel, 'guild', None)
+        self.author = author
+        self.content = content or ''
+        self.embeds = [embed] if embed else []
+
+    async def edit(self, content=None, embed=None, **kwargs):
+        await _rest('message_edit')
+        if self.id not in self.channel.messages:
+            raise discord.NotFound(_FakeResponse(404), 'Unknown Message')
+        if content is not None:
+            self.content = content
+        if embed is not None:
+            self.embeds = [embed]
+        return self
+
+    async def delete(self, **kwargs):
+        await _rest('message_delete')
+        if self.channel.messages.pop(self.id, None) is None:
+            raise discord.NotFound(_FakeResponse(404), 'Unknown Message')
+
+
+class FakeRawMessageDelete:
+    def __init__(self, message):
+        self.message_id = message.id
+        self.channel_id = message.channel.id
+        self.guild_id = message.guild.id
+        self.cached_message = None
+
+
+class FakeRawMessageUpdate:
+    def __init__(self, message):
+        self.message_id = message.id
+        self.channel_id = message.channel.id
+        self.guild_id = message.guild.id
+        self.data = {'id': str(message.id), 'content': message.content,
+                     'author': {'id': str(message.author.id), 'bot': message.author.bot}}
+        self.cached_message = None
+
+
+class _FakeResponse:
+    """Enough of an aiohttp response for discord.HTTPException."""
+
+    def __init__(self, status):
+        self.status = status
+        self.reason = 'Fake'
+
+
+class FakeChannel:
+    def __init__(self, guild, name, channel_id=None):
+        self.id = channel_id or snowflake()
+        self.guild = guild
+        self.name = name
+        self.mention = f"<#{self.id}>"
+        self.messages = {}
+        self.voice_states = {}
+
+    async def send(self, content=None, embed=None, file=None, files=None, **kwargs):
+        await _rest('message_send')
+        message = FakeMessage(self, None, content, embed)
+        self.messages[message.id] = message
+        return message
+
+    def get_partial_message(self, message_id):
+        return self.messages.get(message_id) or FakeMessage(self, None, message_id=message_id)
+
+    async def fetch_message(self, message_id):
+        await _rest('message_fetch')
+        try:
+            return self.messages[message_id]
+        except KeyError:
+            raise discord.NotFound(_FakeResponse(404), 'Unknown Message') from None
+
+
+class FakeVoiceState:
+    def __init__(self, channel=None):
+        self.channel = channel
+
+
+class FakeGuild:
+    def __init__(self, name='Bench Guild', guild_id=None, chunked=True):
+        self.id = guild_id or snowflake()
+        self.name = name
+        self.chunked = chunked
+        self.unavailable = False
+        self.filesize_limit = 25 * 1024 * 1024
+        self.default_role = FakeRole(self, '@everyone', self.id)
+        self.roles = [self.default_role]
+        self.channels = []
+        self.voice_channels = []
+        self.stage_channels = []
+        self.afk_channel = None
+        self._members = {}   # cached members
+        self._all = {}       # every member, as Discord would know them
+
+    @property
+    def members(self):
+        return list(self._members.values())
+
+    @property
+    def member_count(self):
+        return len(self._all)
+
+    def add_role(self, name):
+        role = FakeRole(self, name)
+        self.roles.append(role)
+        return role
+
+    def add_channel(self, name):
+        channel = FakeChannel(self, name)
+        self.channels.append(channel)
+        return channel
+
+    def add_voice_channel(self, name):
+        channel = FakeChannel(self, name)
+        self.voice_channels.append(channel)
+        return channel
+
+    def add_member(self, name, roles=(), cached=True):
+        member = FakeMember(self, name, roles)
+        self._all[member.id] = member
+        if cached:
+            self._members[member.id] = member
+        return member
+
+    def get_member(self, user_id):
+        return self._members.get(user_id)
+
+    def get_role(self, role_id):
+        return discord.utils.get(self.roles, id=role_id)
+
+    def get_channel(self, channel_id):
+        return discord.utils.get(self.channels, id=channel_id)
+
+    async def query_members(self, user_ids=None, cache=True, **kwargs):
+        await _rest('gateway_query_members')
+        found = [self._all[uid] for uid in user_ids or () if uid in self._all]
+        if cache:
+            self._members.update((m.id, m) for m in found)
+        return found
+
+    async def fetch_members(self, limit=1000, **kwargs):
+        members = list(self._all.values())
+        for i in range(0, len(members), 1000):
+            await _rest('member_list_page')
+            for member in members[i:i + 1000]:
+                yield member
+
+
+class FakeInteractionResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def send_message(self, content=None, embed=None, file=None, ephemeral=False, **kwargs):
+        await _rest('interaction_response')
+        self._done = True
+        self._interaction.sent.append(content or embed)
+
+    async def defer(self, ephemeral=False, thinking=False):
+        await _rest('interaction_defer')
+        self._done = True
+
+
+class FakeWebhook:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, embed=None, file=None, files=None, ephemeral=False, **kwargs):
+        await _rest('followup_send')
+        self._interaction.sent.append(content or embed or file or files)
+
+
+class FakeInteraction:
+    def __init__(self, bot, guild, user, command=None):
+        self.id = snowflake()
+        self.client = bot
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user
+        self.channel = guild.channels[0] if guild.channels else None
+        self.command = command
+        self.created_at = discord.utils.utcnow()
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeWebhook(self)
+        self.sent = []
+
+    async def edit_original_response(self, content=None, **kwargs):
+        await _rest('interaction_edit')
+
+    async def delete_original_response(self):
+        await _rest('interaction_delete')
+
+
+class FakeBot:
+    """Just enough of commands.Bot for the cogs: lookups, cogs and the loop monitor."""
+
+    def __init__(self, loop_monitor=None):
+        self.user = FakeUser(name='StaffSuite', bot=True)
+        self.guilds = []
+        self.cogs = {}
+        self.loop_monitor = loop_monitor
+        self.latency = 0.05
+        self.shard_count = 1
+        self.shard_ids = None
+        self.shards = {}
+        self.launch_time = discord.utils.utcnow()
+
+    @property
+    def latencies(self):
+        return [(0, self.latency)]
+
+    def is_ready(self):
+        return True
+
+    async def wait_until_ready(self):
+        pass
+
+    def is_closed(self):
+        return False
+
+    async def add_cog(self, cog, **kwargs):
+        self.cogs[cog.qualified_name] = cog
+        await discord.utils.maybe_coroutine(cog.cog_load)
+
+    async def remove_cog(self, name):
+        cog = self.cogs.pop(name, None)
+        if cog:
+            await discord.utils.maybe_coroutine(cog.cog_unload)
+
+    def get_cog(self, name):
+        return self.cogs.get(name)
+
+    def get_guild(self, guild_id):
+        return discord.utils.get(self.guilds, id=guild_id)
+
+    def get_channel(self, channel_id):
+        for guild in self.guilds:
+            channel = guild.get_channel(channel_id)
+            if channel:
+                return channel
+        return None
+
+    def get_partial_messageable(self, channel_id, **kwargs):
+        return self.get_channel(channel_id)
+
+    def get_user(self, user_id):
+        for guild in self.guilds:
+            member = guild.get_member(user_id)
+            if member:
+                return member
+        return None
+
+    async def fetch_user(self, user_id):
+        await _rest('user_fetch')
+        for guild in self.guilds:
+            if user_id in guild._all:
+                return guild._all[user_id]
+        raise discord.NotFound(_FakeResponse(404), 'Unknown User')
@@ -0,0 +1,747 @@
+"""In-memory stand-in for the subset of AsyncMongoClient the bot uses.
+
+Documents live in dicts and go through a BSON-like normalisation on the way
+in (aware datetimes become naive UTC, tuples become lists), so code sees the
+same shapes it would get from a real server. Equality lookups on a prefix of
+a declared index are served from hash indexes built on first use; unique
+indexes are enforced. Everything else is a scan, which is fine for what this
+is for: exercising the cogs' query patterns offline and counting operations.
+
+`install()` must run before anything imports `db` from utils.mongo.
+"""
+import asyncio
+import contextvars
+import copy
+import operator
+from collections import Counter
+from datetime import datetime, timezone
+import bson
+from pymongo import InsertOne, ReturnDocument, UpdateOne, UpdateMany, DeleteOne, DeleteMany, ReplaceOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.results import (
+    BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult,
+)
+
+# Label operations are counted under; the harness sets it around each command
+LABEL = contextvars.ContextVar('mongo_label', default='background')
+OPS = Counter()  # (label, collection, operation) -> count
+# Simulated server round trip in seconds. Even at 0 every operation yields to
+# the event loop once, as a real network call would.
+LATENCY = 0.0
+CURSOR_BATCH = 101
+
+
+async def _round_trip():
+    await asyncio.sleep(LATENCY)
+
+
+def install(uri=None, database='staffsuite_bench'):
+    """Point utils.mongo at the in-memory stand-in, or at a scratch database on `uri`."""
+    import utils.mongo
+    if uri:
+        from pymongo import AsyncMongoClient, monitoring
+
+        class _Counter(monitoring.CommandListener):
+            def started(self, event):
+                target = event.command.get(event.command_name)
+                OPS[(LABEL.get(), target if isinstance(target, str) else '-', event.command_name)] += 1
+
+            def succeeded(self, event):
+                pass
+
+            def failed(self, event):
+                pass
+
+        utils.mongo.client = AsyncMongoClient(uri, event_listeners=[_Counter()])
+    else:
+        utils.mongo.client = FakeClient()
+    utils.mongo.db = utils.mongo.client[database]
+    return utils.mongo.db
+
+
+# ---- values ----
+
+def _normalize(value):
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    if isinstance(value, datetime):
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+_MISSING = object()
+
+
+def _get(doc, path):
+    for part in path.split('.'):
+        if not isinstance(doc, dict) or part not in doc:
+            return _MISSING
+        doc = doc[part]
+    return doc
+
+
+def _set(doc, path, value):
+    *parents, last = path.split('.')
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+
+def _unset(doc, path):
+    *parents, last = path.split('.')
+    for part in parents:
+        doc = doc.get(part, {})
+    doc.pop(last, None)
+
+
+def _type_rank(value):
+    # BSON comparison order for the types the bot stores
+    if value is None or value is _MISSING:
+        return 0
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 1
+    if isinstance(value, str):
+        return 2
+    if isinstance(value, dict):
+        return 3
+    if isinstance(value, list):
+        return 4
+    if isinstance(value, bson.ObjectId):
+        return 7
+    if isinstance(value, datetime):
+        return 9
+    return 10
+
+
+def _sort_key(value):
+    value = None if value is _MISSING else value
+    return (_type_rank(value), value if value is not None and not isinstance(value, (dict, list)) else 0)
+
+
+def _cmp(op):
+    def compare(actual, expected):
+        if actual is _MISSING or actual is None or _type_rank(actual) != _type_rank(expected):
+            return False
+        return op(actual, expected)
+    return compare
+
+
+_OPERATORS = {
+    '$gt': _cmp(operator.gt), '$gte': _cmp(operator.ge), '$lt': _cmp(operator.lt), '$lte': _cmp(operator.le),
+    '$ne': lambda a, e: not _equals(a, e),
+    '$eq': lambda a, e: _equals(a, e),
+    '$in': lambda a, e: any(_equals(a, v) for v in e),
+    '$nin': lambda a, e: not any(_equals(a, v) for v in e),
+    '$exists': lambda a, e: (a is not _MISSING) == bool(e),
+}
+
+
+def _equals(actual, expected):
+    if expected is None:
+        return actual is None or actual is _MISSING
+    if isinstance(actual, list) and not isinstance(expected, list):
+        return expected in actual
+    return actual is not _MISSING and actual == expected
+
+
+def _is_operator_dict(value):
+    return isinstance(value, dict) and value and all(k.startswith('$') for k in value)
+
+
+def matches(doc, flt):
+    for key, expected in flt.items():
+        if key == '$and':
+            if not all(matches(doc, f) for f in expected):
+                return False
+        elif key == '$or':
+            if not any(matches(doc, f) for f in expected):
+                return False
+        elif key == '$nor':
+            if any(matches(doc, f) for f in expected):
+                return False
+        elif _is_operator_dict(expected):
+            actual = _get(doc, key)
+            for op, operand in expected.items():
+                if op not in _OPERATORS:
+                    raise NotImplementedError(f"query operator {op}")
+                if not _OPERATORS[op](actual, operand):
+                    return False
+        elif not _equals(_get(doc, key), expected):
+            return False
+    return True
+
+
+def _project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+    include = {k for k, v in projection.items() if v and k != '_id'}
+    if include:
+        out = {k: copy.deepcopy(doc[k]) for k in include if k in doc}
+        if projection.get('_id', 1) and '_id' in doc:
+            out['_id'] = doc['_id']
+        return out
+    return {k: copy.deepcopy(v) for k, v in doc.items() if projection.get(k, 1)}
+
+
+def _sort_docs(docs, sort):
+    for field, direction in reversed(sort):
+        docs.sort(key=lambda d: _sort_key(_get(d, field)), reverse=direction == -1)
+    return docs
+
+
+def _sort_spec(key, direction=None):
+    if isinstance(key, str):
+        return [(key, direction or 1)]
+    if isinstance(key, dict):
+        return list(key.items())
+    return list(key)
+
+
+# ---- updates ----
+
+def _apply_update(doc, update, inserting=False):
+    if not _is_operator_dict(update):
+        raise NotImplementedError('replacement documents go through replace_one')
+    for op, fields in update.items():
+        for path, value in fields.items():
+            current = _get(doc, path)
+            if op == '$set':
+                _set(doc, path, _normalize(value))
+            elif op == '$setOnInsert':
+                if inserting:
+                    _set(doc, path, _normalize(value))
+            elif op == '$unset':
+                _unset(doc, path)
+            elif op == '$inc':
+                _set(doc, path, (0 if current is _MISSING else current) + value)
+            elif op == '$min':
+                value = _normalize(value)
+                if current is _MISSING or value < current:
+                    _set(doc, path, value)
+            elif op == '$max':
+                value = _normalize(value)
+                if current is _MISSING or value > current:
+                    _set(doc, path, value)
+            elif op == '$push':
+                items = value['$each'] if isinstance(value, dict) and '$each' in value else [value]
+                _set(doc, path, (list(current) if current is not _MISSING else []) + _normalize(items))
+            elif op == '$addToSet':
+                items = list(current) if current is not _MISSING else []
+                for item in (value['$each'] if isinstance(value, dict) and '$each' in value else [value]):
+                    if item not in items:
+                        items.append(_normalize(item))
+                _set(doc, path, items)
+            elif op == '$pull':
+                if current is not _MISSING:
+                    _set(doc, path, [v for v in current if not (matches({'v': v}, {'v': value}))])
+            elif op == '$pullAll':
+                if current is not _MISSING:
+                    _set(doc, path, [v for v in current if v not in value])
+            else:
+                raise NotImplementedError(f"update operator {op}")
+
+
+def _upsert_base(flt):
+    doc = {}
+    for key, value in flt.items():
+        if not key.startswith('$') and not _is_operator_dict(value):
+            _set(doc, key, _normalize(value))
+        elif isinstance(value, dict) and '$eq' in value:
+            _set(doc, key, _normalize(value['$eq']))
+    return doc
+
+
+# ---- aggregation ----
+
+def _expr(doc, expr):
+    if isinstance(expr, str) and expr.startswith('$'):
+        value = _get(doc, expr[1:])
+        return None if value is _MISSING else value
+    if isinstance(expr, dict) and len(expr) == 1:
+        (op, args), = expr.items()
+        if op in ('$add', '$multiply', '$subtract', '$divide'):
+            a, *rest = [_expr(doc, x) for x in args]
+            for b in rest:
+                a = {'$add': operator.add, '$multiply': operator.mul,
+                     '$subtract': operator.sub, '$divide': operator.truediv}[op](a, b)
+            return a
+        if op == '$cond':
+            cond, then, other = args if isinstance(args, list) else (args['if'], args['then'], args['else'])
+            return _expr(doc, then) if _expr(doc, cond) else _expr(doc, other)
+        if op == '$eq':
+            return _expr(doc, args[0]) == _expr(doc, args[1])
+        if op == '$literal':
+            return args
+        if op.startswith('$'):
+            raise NotImplementedError(f"expression {op}")
+    if isinstance(expr, dict):
+        return {k: _expr(doc, v) for k, v in expr.items()}
+    return expr
+
+
+def _group(docs, spec):
+    groups = {}
+    for doc in docs:
+        key = _expr(doc, spec['_id'])
+        hashable = bson.encode({'k': key}) if isinstance(key, dict) else key
+        state = groups.setdefault(hashable, {'_id': key, '_rows': []})
+        state['_rows'].append(doc)
+    out = []
+    for state in groups.values():
+        row = {'_id': state['_id']}
+        rows = state.pop('_rows')
+        for field, acc in spec.items():
+            if field == '_id':
+                continue
+            (op, arg), = acc.items()
+            values = [_expr(d, arg) for d in rows]
+            present = [v for v in values if v is not None]
+            if op == '$sum':
+                row[field] = sum(v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool))
+            elif op == '$avg':
+                row[field] = sum(present) / len(present) if present else None
+            elif op == '$min':
+                row[field] = min(present, default=None)
+            elif op == '$max':
+                row[field] = max(present, default=None)
+            elif op == '$first':
+                row[field] = values[0]
+            elif op == '$last':
+                row[field] = values[-1]
+            elif op == '$push':
+                row[field] = values
+            elif op == '$addToSet':
+                row[field] = list(dict.fromkeys(values))
+            else:
+                raise NotImplementedError(f"accumulator {op}")
+        out.append(row)
+    return out
+
+
+def _aggregate(docs, pipeline):
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == '$match':
+            docs = [d for d in docs if matches(d, spec)]
+        elif name == '$sort':
+            docs = _sort_docs(list(docs), list(spec.items()))
+        elif name == '$group':
+            docs = _group(docs, spec)
+        elif name == '$limit':
+            docs = docs[:spec]
+        elif name == '$skip':
+            docs = docs[spec:]
+        elif name == '$count':
+            docs = [{spec: len(docs)}]
+        elif name == '$project':
+            if all(v in (0, 1, True, False) for v in spec.values()):
+                docs = [_project(d, spec) for d in docs]
+            else:
+                docs = [{'_id': d.get('_id'), **{k: _expr(d, v if v not in (1, True) else f'${k}')
+                                                  for k, v in spec.items() if k != '_id'}} for d in docs]
+        else:
+            raise NotImplementedError(f"aggregation stage {name}")
+    return docs
+
+
+# ---- client objects ----
+
+class FakeCursor:
+    def __init__(self, collection, docs_fn, projection=None, op='find'):
+        self._collection = collection
+        self._docs_fn = docs_fn
+        self._projection = projection
+        self._sort = None
+        self._limit = 0
+        self._skip = 0
+        self._op = op
+        self._iter = None
+
+    def sort(self, key, direction=None):
+        self._sort = _sort_spec(key, direction)
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def skip(self, n):
+        self._skip = n
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    async def _results(self):
+        await self._collection._count(self._op)
+        docs = list(self._docs_fn())
+        if self._sort:
+            docs = _sort_docs(docs, self._sort)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(d, self._projection) for d in docs]
+
+    async def to_list(self, length=None):
+        docs = await self._results()
+        return docs[:length] if length else docs
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._iter is None:
+            self._iter = enumerate(await self._results(), 1)
+        try:
+            n, doc = next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+        if n % CURSOR_BATCH == 0:
+            # getMore
+            await _round_trip()
+        return doc
+
+    async def close(self):
+        pass
+
+
+class FakeCollection:
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self._docs = {}      # _id -> document
+        self._declared = []  # (fields tuple, unique)
+        self._hashes = {}    # fields tuple -> {key tuple -> set of _ids}
+
+    async def _count(self, op):
+        OPS[(LABEL.get(), self.name, op)] += 1
+        await _round_trip()
+
+    # indexes
+
+    async def create_indexes(self, models):
+        names = []
+        for model in models:
+            spec = model.document
+            self._declare(tuple(spec['key'].keys()), spec.get('unique', False))
+            names.append(spec['name'])
+        return names
+
+    async def create_index(self, keys, unique=False, **kwargs):
+        keys = _sort_spec(keys)
+        self._declare(tuple(field for field, _ in keys), unique)
+        return '_'.join(f"{field}_{direction}" for field, direction in keys)
+
+    def _declare(self, fields, unique):
+        if (fields, unique) not in self._declared:
+            self._declared.append((fields, unique))
+            if unique:
+                self._hash(fields)
+
+    def _hash(self, fields):
+        table = self._hashes.get(fields)
+        if table is None:
+            table = self._hashes[fields] = {}
+            for doc in self._docs.values():
+                table.setdefault(self._key(doc, fields), set()).add(doc['_id'])
+        return table
+
+    @staticmethod
+    def _key(doc, fields):
+        values = []
+        for field in fields:
+            value = _get(doc, field)
+            values.append(None if value is _MISSING else (tuple(value) if isinstance(value, list) else value))
+        return tuple(values)
+
+    def _index_add(self, doc):
+        for fields, unique in self._declared:
+            if unique:
+                ids = self._hashes[fields].get(self._key(doc, fields))
+                if ids and ids != {doc['_id']}:
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {fields}",
+                                            11000)
+        for fields, table in self._hashes.items():
+            table.setdefault(self._key(doc, fields), set()).add(doc['_id'])
+
+    def _index_remove(self, doc):
+        for fields, table in self._hashes.items():
+            ids = table.get(self._key(doc, fields))
+            if ids:
+                ids.discard(doc['_id'])
+
+    def _candidates(self, flt):
+        best = ()
+        for fields, _ in self._declared + [(('_id',), True)]:
+            prefix = []
+            for field in fields:
+                value = flt.get(field, _MISSING)
+                if value is _MISSING or isinstance(value, (dict, list)) or value is None:
+                    break
+                prefix.append(field)
+            if len(prefix) > len(best):
+                best = tuple(prefix)
+        if not best:
+            return list(self._docs.values())
+        if best == ('_id',):
+            doc = self._docs.get(flt['_id'])
+            return [doc] if doc else []
+        return [self._docs[i] for i in self._hash(best).get(tuple(flt[f] for f in best), ())]
+
+    def _matching(self, flt):
+        flt = _normalize(flt or {})
+        return [d for d in self._candidates(flt) if matches(d, flt)]
+
+    # reads
+
+    def find(self, filter=None, projection=None, sort=None, limit=0, batch_size=None, **kwargs):
+        cursor = FakeCursor(self, lambda: self._matching(filter), projection)
+        if sort:
+            cursor.sort(sort)
+        return cursor.limit(limit)
+
+    async def find_one(self, filter=None, projection=None, sort=None, **kwargs):
+        if filter is not None and not isinstance(filter, dict):
+            filter = {'_id': filter}
+        docs = await self.find(filter, projection, sort=sort, limit=1).to_list(None)
+        return docs[0] if docs else None
+
+    async def count_documents(self, filter, **kwargs):
+        await self._count('count')
+        return len(self._matching(filter))
+
+    async def estimated_document_count(self, **kwargs):
+        await self._count('count')
+        return len(self._docs)
+
+    async def distinct(self, key, filter=None, **kwargs):
+        await self._count('distinct')
+        return list(dict.fromkeys(v for d in self._matching(filter) if (v := _get(d, key)) is not _MISSING))
+
+    async def aggregate(self, pipeline, **kwargs):
+        docs = list(self._docs.values())
+        return FakeCursor(self, lambda: _aggregate(docs, copy.deepcopy(_normalize(pipeline))), op='aggregate')
+
+    async def watch(self, *args, **kwargs):
+        raise OperationFailure('The $changeStream stage is only supported on replica sets', 40573)
+
+    # writes
+
+    def _insert(self, doc):
+        doc.setdefault('_id', bson.ObjectId())
+        stored = _normalize(doc)
+        if stored['_id'] in self._docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: _id_", 11000)
+        self._index_add(stored)
+        self._docs[stored['_id']] = stored
+        return stored['_id']
+
+    async def insert_one(self, document, **kwargs):
+        await self._count('insert')
+        return InsertOneResult(self._insert(document), True)
+
+    async def insert_many(self, documents, ordered=True, **kwargs):
+        await self._count('insert')
+        ids, errors = [], []
+        for i, doc in enumerate(documents):
+            try:
+                ids.append(self._insert(doc))
+            except DuplicateKeyError as e:
+                errors.append({'index': i, 'code': 11000, 'errmsg': str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({'writeErrors': errors, 'nInserted': len(ids)})
+        return InsertManyResult(ids, True)
+
+    def _replace(self, old, new):
+        self._index_remove(old)
+        try:
+            self._index_add(new)
+        except DuplicateKeyError:
+            self._index_add(old)
+            raise
+        self._docs[old['_id']] = new
+
+    def _update(self, filter, update, upsert=False, many=False, array_filters=None):
+        matched = self._matching(filter)
+        if not many:
+            matched = matched[:1]
+        for doc in matched:
+            new = copy.deepcopy(doc)
+            _apply_update(new, update)
+            self._replace(doc, new)
+        if matched or not upsert:
+            return len(matched), None, [m['_id'] for m in matched]
+        doc = _upsert_base(_normalize(filter))
+        _apply_update(doc, update, inserting=True)
+        return 0, self._insert(doc), []
+
+    async def update_one(self, filter, update, upsert=False, **kwargs):
+        await self._count('update')
+        n, upserted, _ = self._update(filter, update, upsert)
+        return UpdateResult({'n': n or int(upserted is not None), 'nModified': n, 'upserted': upserted}, True)
+
+    async def update_many(self, filter, update, upsert=False, **kwargs):
+        await self._count('update')
+        n, upserted, _ = self._update(filter, update, upsert, many=True)
+        return UpdateResult({'n': n or int(upserted is not None), 'nModified': n, 'upserted': upserted}, True)
+
+    async def replace_one(self, filter, replacement, upsert=False, **kwargs):
+        await self._count('update')
+        matched = self._matching(filter)[:1]
+        if matched:
+            new = _normalize({**replacement, '_id': matched[0]['_id']})
+            self._replace(matched[0], new)
+            return UpdateResult({'n': 1, 'nModified': 1}, True)
+        if upsert:
+            doc = {**_upsert_base(_normalize(filter)), **replacement}
+            return UpdateResult({'n': 1, 'nModified': 0, 'upserted': self._insert(doc)}, True)
+        return UpdateResult({'n': 0, 'nModified': 0}, True)
+
+    async def find_one_and_update(self, filter, update, projection=None, sort=None, upsert=False,
+                                  return_document=ReturnDocument.BEFORE, **kwargs):
+        await self._count('findAndModify')
+        matched = self._matching(filter)
+        if sort:
+            matched = _sort_docs(matched, _sort_spec(sort))
+        if matched:
+            before = matched[0]
+            after = copy.deepcopy(before)
+            _apply_update(after, update)
+            self._replace(before, after)
+            return _project(after if return_document == ReturnDocument.AFTER else before, projection)
+        if not upsert:
+            return None
+        doc = _upsert_base(_normalize(filter))
+        _apply_update(doc, update, inserting=True)
+        _id = self._insert(doc)
+        return _project(self._docs[_id], projection) if return_document == ReturnDocument.AFTER else None
+
+    async def find_one_and_delete(self, filter, projection=None, sort=None, **kwargs):
+        await self._count('findAndModify')
+        matched = self._matching(filter)
+        if sort:
+            matched = _sort_docs(matched, _sort_spec(sort))
+        if not matched:
+            return None
+        self._delete(matched[0])
+        return _project(matched[0], projection)
+
+    def _delete(self, doc):
+        self._index_remove(doc)
+        del self._docs[doc['_id']]
+
+    async def delete_one(self, filter, **kwargs):
+        await self._count('delete')
+        matched = self._matching(filter)[:1]
+        for doc in matched:
+            self._delete(doc)
+        return DeleteResult({'n': len(matched)}, True)
+
+    async def delete_many(self, filter, **kwargs):
+        await self._count('delete')
+        matched = self._matching(filter)
+        for doc in matched:
+            self._delete(doc)
+        return DeleteResult({'n': len(matched)}, True)
+
+    async def bulk_write(self, requests, ordered=True, **kwargs):
+        await self._count('bulkWrite')
+        counts = {'nInserted': 0, 'nMatched': 0, 'nModified': 0, 'nRemoved': 0, 'nUpserted': 0, 'upserted': [],
+                  'writeErrors': [], 'writeConcernErrors': []}
+        for i, req in enumerate(requests):
+            try:
+                if isinstance(req, InsertOne):
+                    self._insert(req._doc)
+                    counts['nInserted'] += 1
+                elif isinstance(req, (UpdateOne, UpdateMany)):
+                    n, upserted, _ = self._update(req._filter, req._doc, req._upsert, many=isinstance(req, UpdateMany))
+                    counts['nMatched'] += n
+                    counts['nModified'] += n
+                    if upserted is not None:
+                        counts['nUpserted'] += 1
+                        counts['upserted'].append({'index': i, '_id': upserted})
+                elif isinstance(req, ReplaceOne):
+                    await self.replace_one(req._filter, req._doc, req._upsert)
+                    counts['nMatched'] += 1
+                elif isinstance(req, (DeleteOne, DeleteMany)):
+                    matched = self._matching(req._filter)
+                    for doc in matched if isinstance(req, DeleteMany) else matched[:1]:
+                        self._delete(doc)
+                        counts['nRemoved'] += 1
+                else:
+                    raise NotImplementedError(type(req).__name__)
+            except DuplicateKeyError as e:
+                counts['writeErrors'].append({'index': i, 'code': 11000, 'errmsg': str(e)})
+                if ordered:
+                    break
+        if counts['writeErrors']:
+            raise BulkWriteError(counts)
+        return BulkWriteResult(counts, True)
+
+    async def drop(self):
+        self._docs.clear()
+        self._hashes.clear()
+        self._declared.clear()
+
+
+class FakeDatabase:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self._collections = {}
+
+    def __getitem__(self, name):
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = FakeCollection(self, name)
+        return collection
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+    async def command(self, command, *args, **kwargs):
+        name = command if isinstance(command, str) else next(iter(command))
+        if name == 'ping':
+            return {'ok': 1.0}
+        raise OperationFailure(f"command {name} is not supported by the in-memory stand-in")
+
+    async def list_collection_names(self):
+        return list(self._collections)
+
+    async def drop_collection(self, name):
+        self._collections.pop(name, None)
+
+
+class FakeClient:
+    def __init__(self):
+        self._databases = {}
+
+    def __getitem__(self, name):
+        database = self._databases.get(name)
+        if database is None:
+            database = self._databases[name] = FakeDatabase(self, name)
+        return database
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+    async def drop_database(self, name):
+        self._databases.pop(name if isinstance(name, str) else name.name, None)
+
+    async def close(self):
+        pass
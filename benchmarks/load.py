@@ -0,0 +1,430 @@
+"""Offline load test: the real cogs against fake Discord objects and a local Mongo stand-in.
+
+    python -m benchmarks.load --staff 5000 --days 730 --requests 20000 --concurrency 50
+    python -m benchmarks.load --mongo mongodb://localhost:27017     # scratch db on a local mongod
+    python -m benchmarks.load --json run.json --baseline main.json  # fail on regressions
+
+Seeds one guild with `--staff` members and `--days` of sign-in/out history
+(plus the matching daily rollups, salaries and open sessions), loads every
+cog through its `setup()`, then replays a weighted mix of slash commands and
+gateway events from `--concurrency` concurrent clients. App command checks
+(owner-only, Pro) are bypassed; everything after them runs as in production,
+including the attendance board refresher, write-behind and mod-log dispatcher.
+
+The report lists per command: throughput, p50/p99 latency, Mongo operations
+and simulated REST calls per invocation. Work a command hands to a background
+task is counted under the request that started the task (write-behind flushes
+are counted as `background`, board redraws as `board_refresh`). The in-memory
+stand-in makes latencies optimistic; operation counts are exact either way.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter, defaultdict, deque
+from datetime import datetime, timedelta
+
+DEFAULT_MIX = {
+    'duty': 60, 'profile': 10, 'ping': 5, 'rules': 5, 'feedback': 3, 'get_salary': 5,
+    'attendance_report': 1, 'message': 30, 'message_delete': 5, 'message_edit': 5, 'member_join': 1, 'voice': 20,
+}
+COGS = ['attendance', 'devtools', 'general', 'logging', 'moderation', 'priority', 'reporting', 'salary', 'setup', 'voice']
+SEED_BATCH = 10_000
+
+
+def parse_mix(text):
+    mix = dict(DEFAULT_MIX)
+    for item in filter(None, (text or '').split(',')):
+        name, _, weight = item.partition('=')
+        mix[name.strip()] = float(weight)
+    return {k: v for k, v in mix.items() if v > 0}
+
+
+def percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+class World:
+    """The seeded guild and the fakes the cogs run against."""
+
+    def __init__(self, bot, guild, staff, channels, staff_role):
+        self.bot = bot
+        self.guild = guild
+        self.staff = staff
+        self.channels = channels
+        self.staff_role = staff_role
+        self.signed_in = set()
+        self.voice_channels = [guild.add_voice_channel(f"voice{i}") for i in range(4)]
+        self.in_voice = {}  # member id -> voice channel
+        self.messages = deque(maxlen=5000)  # recently sent, for delete/edit events
+
+
+async def build_world(args, db):
+    from benchmarks.fakediscord import FakeBot, FakeGuild
+    from utils.looplag import LoopLagMonitor
+    from utils import rollups
+
+    rng = random.Random(args.seed)
+    bot = FakeBot(LoopLagMonitor())
+    guild = FakeGuild(chunked=not args.lean)
+    bot.guilds.append(guild)
+    staff_role = guild.add_role('Staff')
+    channels = {name: guild.add_channel(name) for name in ('attendance', 'mod-logs', 'feedback', 'general')}
+    # Lean mode: nothing cached up front, members are fetched on demand
+    staff = [guild.add_member(f"staff{i}", [staff_role], cached=not args.lean) for i in range(args.staff)]
+    for i in range(args.staff // 10):
+        guild.add_member(f"member{i}", cached=not args.lean)
+
+    await db.settings.insert_one({
+        'guild_id': guild.id, 'staff_role': 'Staff', 'attendance_channel': channels['attendance'].id,
+        'mod_logs': channels['mod-logs'].id, 'feedback_channel': channels['feedback'].id,
+        'rules_text': 'Be excellent to each other.', 'attendance_message_ids': [], 'rev': 0,
+    })
+
+    start = time.perf_counter()
+    now = datetime.utcnow().replace(microsecond=0)
+    first_day = datetime.combine((now - timedelta(days=args.days)).date(), datetime.min.time())
+    logs, daily, sessions_open, count = [], {}, [], 0
+
+    async def flush_logs():
+        for i in range(0, len(logs), SEED_BATCH):
+            await db.logs.insert_many(logs[i:i + SEED_BATCH], ordered=False)
+        logs.clear()
+
+    for member in staff:
+        for d in range(args.days):
+            if rng.random() >= args.activity:
+                continue
+            signin = first_day + timedelta(days=d, hours=rng.uniform(6, 22))
+            signout = signin + timedelta(hours=rng.uniform(0.5, 8))
+            if signout >= now:
+                continue
+            logs.append({'guild_id': guild.id, 'user_id': member.id, 'type': 'signin', 'timestamp': signin})
+            logs.append({'guild_id': guild.id, 'user_id': member.id, 'type': 'signout', 'timestamp': signout,
+                         'report': 'Handled tickets.'})
+            for i, (day, s, e) in enumerate(rollups.day_slices(signin, signout)):
+                row = daily.setdefault((member.id, day), {
+                    'guild_id': guild.id, 'user_id': member.id, 'day': day,
+                    'sessions': 0, 'seconds': 0.0, 'first_seen': s, 'last_seen': e,
+                })
+                row['sessions'] += 1 if i == 0 else 0
+                row['seconds'] += (e - s).total_seconds()
+                row['first_seen'], row['last_seen'] = min(row['first_seen'], s), max(row['last_seen'], e)
+            count += 1
+        if rng.random() < args.present:
+            started = now - timedelta(minutes=rng.uniform(1, 480))
+            sessions_open.append({'guild_id': guild.id, 'user_id': member.id, 'started_at': started})
+            logs.append({'guild_id': guild.id, 'user_id': member.id, 'type': 'signin', 'timestamp': started})
+        if len(logs) >= SEED_BATCH:
+            await flush_logs()
+    await flush_logs()
+    rows = list(daily.values())
+    for i in range(0, len(rows), SEED_BATCH):
+        await db.attendance_daily.insert_many(rows[i:i + SEED_BATCH], ordered=False)
+    if sessions_open:
+        await db.sessions.insert_many(sessions_open)
+    await db.salary.insert_many([
+        {'guild_id': guild.id, 'user_id': m.id, 'salary': rng.randrange(20_000, 90_000, 500)} for m in staff
+    ])
+    print(f"🌱 Seeded {args.staff} staff, {count} past sessions over {args.days} days, "
+          f"{len(rows)} rollup rows, {len(sessions_open)} on duty in {time.perf_counter() - start:.1f}s")
+
+    world = World(bot, guild, staff, channels, staff_role)
+    world.signed_in = {s['user_id'] for s in sessions_open}
+    return world
+
+
+def scenarios(world, rng):
+    """name -> coroutine function running one request and returning the label to record it under."""
+    from benchmarks.fakediscord import (
+        FakeInteraction, FakeMessage, FakeRawMessageDelete, FakeRawMessageUpdate, FakeVoiceState
+    )
+    bot, guild = world.bot, world.guild
+    cog = bot.get_cog
+
+    def interaction(command, user=None):
+        return FakeInteraction(bot, guild, user or rng.choice(world.staff), command)
+
+    async def duty():
+        member = rng.choice(world.staff)
+        attendance = cog('Attendance')
+        if member.id in world.signed_in:
+            world.signed_in.discard(member.id)
+            await attendance.signout.callback(attendance, interaction(attendance.signout, member), report='Bench shift.')
+            return 'signout'
+        world.signed_in.add(member.id)
+        await attendance.signin.callback(attendance, interaction(attendance.signin, member))
+        return 'signin'
+
+    def command(cog_name, name, **kwargs):
+        async def run():
+            instance = cog(cog_name)
+            cmd = getattr(instance, name)
+            await cmd.callback(instance, interaction(cmd), **{k: v() if callable(v) else v for k, v in kwargs.items()})
+            return name
+        return run
+
+    def message(author, message_id=None):
+        return FakeMessage(world.channels['general'], author, f"message {rng.random():.6f}", message_id=message_id)
+
+    async def send_message():
+        sent = message(rng.choice(world.staff))
+        world.messages.append(sent)
+        await cog('Logging').on_message(sent)
+        return 'message'
+
+    async def message_delete():
+        # Mostly recent messages, sometimes one sent before the cache saw it
+        target = world.messages.pop() if world.messages and rng.random() < 0.9 else message(rng.choice(world.staff))
+        await cog('Logging').on_raw_message_delete(FakeRawMessageDelete(target))
+        return 'message_delete'
+
+    async def message_edit():
+        target = rng.choice(world.messages) if world.messages else message(rng.choice(world.staff))
+        await cog('Logging').on_raw_message_edit(FakeRawMessageUpdate(message(target.author, target.id)))
+        return 'message_edit'
+
+    async def voice():
+        # Mostly mute/deafen churn and moves between joins and leaves, as in a busy guild
+        member = rng.choice(world.staff)
+        before = world.in_voice.get(member.id)
+        roll = rng.random()
+        if before is None:
+            after, label = rng.choice(world.voice_channels), 'voice_join'
+        elif roll < 0.5:
+            after, label = before, 'voice_mute'
+        elif roll < 0.7:
+            after, label = rng.choice([c for c in world.voice_channels if c is not before]), 'voice_move'
+        else:
+            after, label = None, 'voice_leave'
+        if after is None:
+            world.in_voice.pop(member.id)
+        else:
+            world.in_voice[member.id] = after
+        await cog('Voice').on_voice_state_update(member, FakeVoiceState(before), FakeVoiceState(after))
+        return label
+
+    async def member_join():
+        await cog('Logging').on_member_join(guild.add_member(f"joiner{rng.random():.6f}"))
+        return 'member_join'
+
+    return {
+        'duty': duty,
+        'profile': command('General', 'profile'),
+        'ping': command('General', 'ping'),
+        'rules': command('General', 'rules'),
+        'feedback': command('General', 'feedback', message='Bench feedback'),
+        'get_salary': command('Salary', 'get_salary', member=lambda: rng.choice(world.staff)),
+        'attendance_report': command('Reporting', 'attendance_report', metric='hours'),
+        'export_timesheet': command('Reporting', 'export_timesheet', month=datetime.utcnow().strftime('%Y-%m')),
+        'payroll_run': command('Salary', 'payroll_run', month=datetime.utcnow().strftime('%Y-%m')),
+        'message': send_message,
+        'message_delete': message_delete,
+        'message_edit': message_edit,
+        'member_join': member_join,
+        'voice': voice,
+    }
+
+
+async def replay(args, world, run_scenario, names, weights, rng):
+    from benchmarks.fakemongo import LABEL
+    latencies, errors = defaultdict(list), Counter()
+    first_error = {}
+    remaining = iter(range(args.requests))
+
+    async def client():
+        for _ in remaining:
+            name = rng.choices(names, weights)[0]
+            token = LABEL.set(name)
+            start = time.perf_counter()
+            label = name
+            try:
+                label = await run_scenario[name]() or name
+            except Exception as e:
+                errors[name] += 1
+                first_error.setdefault(name, f"{type(e).__name__}: {e}")
+            finally:
+                latencies[label].append(time.perf_counter() - start)
+                LABEL.reset(token)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    return latencies, errors, first_error, time.perf_counter() - start
+
+
+def report(latencies, errors, first_error, elapsed, board, args):
+    from benchmarks.fakemongo import OPS
+    from benchmarks.fakediscord import REST_CALLS
+    ops, rest = Counter(), Counter()
+    for (label, _, _), n in OPS.items():
+        ops[label] += n
+    for (label, _), n in REST_CALLS.items():
+        rest[label] += n
+    # Attendance commands count their ops under the scenario name ('duty')
+    split = {'signin': 'duty', 'signout': 'duty'}
+
+    rows = {}
+    for label, samples in sorted({**latencies, 'board_refresh': board}.items()):
+        if not samples:
+            continue
+        ordered = sorted(samples)
+        calls = len(samples) if label not in split else len(latencies['signin']) + len(latencies['signout'])
+        source = split.get(label, label)
+        rows[label] = {
+            'count': len(samples),
+            'errors': errors.get(source, 0) if label not in split else None,
+            'per_s': round(len(samples) / elapsed, 1),
+            'p50_ms': round(percentile(ordered, 50) * 1000, 2),
+            'p99_ms': round(percentile(ordered, 99) * 1000, 2),
+            'max_ms': round(ordered[-1] * 1000, 2),
+            'db_ops': round(ops[source] / calls, 2),
+            'rest': round(rest[source] / calls, 2),
+        }
+
+    print(f"\n⏱️ {sum(len(v) for v in latencies.values())} requests in {elapsed:.1f}s "
+          f"({sum(len(v) for v in latencies.values()) / elapsed:.0f}/s) with {args.concurrency} clients")
+    header = f"{'command':<18}{'count':>8}{'err':>6}{'req/s':>9}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'db/call':>9}{'rest/call':>10}"
+    print(header + "\n" + "-" * len(header))
+    for label, r in rows.items():
+        err = '-' if r['errors'] is None else r['errors']
+        print(f"{label:<18}{r['count']:>8}{err:>6}{r['per_s']:>9}{r['p50_ms']:>10}{r['p99_ms']:>10}"
+              f"{r['max_ms']:>10}{r['db_ops']:>9}{r['rest']:>10}")
+    for name, message in first_error.items():
+        print(f"❌ {name}: {message}")
+    if args.verbose:
+        print("\n🗄️ Mongo operations by label")
+        for (label, collection, op), n in sorted(OPS.items()):
+            print(f"  {label:<18}{collection:<18}{op:<14}{n:>8}")
+    return rows
+
+
+def compare(rows, baseline, tolerance):
+    """Regressions against a previous --json run: slower p99 or more DB/REST calls per command."""
+    problems = []
+    for label, old in baseline.get('commands', {}).items():
+        new = rows.get(label)
+        if not new:
+            continue
+        if new['p99_ms'] > old['p99_ms'] * (1 + tolerance) and new['p99_ms'] - old['p99_ms'] > 1:
+            problems.append(f"{label}: p99 {old['p99_ms']}ms -> {new['p99_ms']}ms")
+        for key in ('db_ops', 'rest'):
+            if new[key] > old[key] * (1 + tolerance) + 0.01:
+                problems.append(f"{label}: {key}/call {old[key]} -> {new[key]}")
+    return problems
+
+
+async def main(args):
+    from benchmarks import fakemongo, fakediscord
+    db = fakemongo.install(args.mongo)
+    if args.mongo:
+        await db.client.drop_database(db.name)
+    fakemongo.LATENCY = args.db_latency / 1000
+    fakediscord.REST_LATENCY = args.rest_latency / 1000
+
+    # Imported only now, so every module binds the stand-in `db`
+    import importlib
+    from utils.migrations import ensure_indexes
+    from utils.settings_cache import settings_cache
+    from utils.writebehind import write_behind
+    from utils import charts
+
+    await ensure_indexes()
+    world = await build_world(args, db)
+    world.bot.loop_monitor.start()
+    await write_behind.start()
+    for name in COGS:
+        await importlib.import_module(f"cogs.{name}").setup(world.bot)
+
+    # Board refreshes run in the refresher's own task; time them separately
+    attendance = world.bot.get_cog('Attendance')
+    refresher = attendance.refresher
+    refresher.debounce, refresher.max_wait = args.board_debounce, args.board_max_wait
+    board = []
+
+    async def timed_refresh(guild_id, refresh=refresher.refresh):
+        token = fakemongo.LABEL.set('board_refresh')
+        start = time.perf_counter()
+        try:
+            await refresh(guild_id)
+        finally:
+            board.append(time.perf_counter() - start)
+            fakemongo.LABEL.reset(token)
+    refresher.refresh = timed_refresh
+    # Draw the initial board so the run measures edits, not the first post
+    await attendance.update_present_for_guild(world.guild.id)
+    fakemongo.OPS.clear()
+    fakediscord.REST_CALLS.clear()
+
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+    run_scenario = scenarios(world, rng)
+    unknown = set(mix) - set(run_scenario)
+    if unknown:
+        print(f"❌ Unknown scenarios: {', '.join(sorted(unknown))}")
+        return 2
+    latencies, errors, first_error, elapsed = await replay(args, world, run_scenario, list(mix), list(mix.values()), rng)
+
+    # Let the last board refresh, mod-log batch and buffered writes land before counting
+    dispatcher = world.bot.get_cog('Logging').dispatcher
+    await asyncio.sleep(max(args.board_max_wait, dispatcher.window) + 0.1)
+    while refresher.pending() or refresher._running or dispatcher.depth():
+        await asyncio.sleep(0.05)
+    await write_behind.flush()
+    rows = report(latencies, errors, first_error, elapsed, board, args)
+
+    lag = world.bot.loop_monitor.summary()
+    print(f"\n🔄 Loop lag p50/p99/max: {lag['p50_ms']}/{lag['p99_ms']}/{lag['max_ms']}ms (blocked {lag['blocked_s']}s)")
+    print(f"🗄️ Settings cache: {settings_cache.stats()}")
+    print(f"📥 Write-behind: {write_behind.stats()}")
+    print(f"📨 Mod-log dispatcher: {dispatcher.stats()}")
+    print(f"🧾 Audit cache: {world.bot.get_cog('Logging').audit.stats()}")
+    print(f"🎙️ Voice sessions: {world.bot.get_cog('Voice').tracker.stats()}")
+
+    for name in list(world.bot.cogs):
+        await world.bot.remove_cog(name)
+    world.bot.loop_monitor.stop()
+    await write_behind.close()
+    charts.shutdown()
+
+    result = {'args': vars(args), 'elapsed_s': round(elapsed, 2), 'loop_lag': lag, 'commands': rows}
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2, default=str)
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(rows, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f"📉 Regression: {problem}")
+        if problems:
+            return 1
+        print("✅ No regressions against the baseline")
+    return 1 if errors else 0
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Offline load test of the StaffSuite cogs.')
+    parser.add_argument('--staff', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=730, help='Days of attendance history to seed')
+    parser.add_argument('--activity', type=float, default=0.05, help='Chance a staff member works on a given day')
+    parser.add_argument('--present', type=float, default=0.1, help='Share of staff signed in at the start')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--mix', default=None, help='Scenario weights, e.g. "duty=80,profile=0,export_timesheet=1"')
+    parser.add_argument('--lean', action='store_true', help='Start with an empty member cache, as in lean gateway mode')
+    parser.add_argument('--db-latency', type=float, default=0.0, help='Simulated latency of each stand-in Mongo call in ms')
+    parser.add_argument('--rest-latency', type=float, default=0.0, help='Simulated latency of each REST call in ms')
+    parser.add_argument('--board-debounce', type=float, default=0.25, help='Board refresher debounce in seconds')
+    parser.add_argument('--board-max-wait', type=float, default=1.0, help='Board refresher max wait in seconds')
+    parser.add_argument('--mongo', default=None, help='Use a scratch database on this mongod instead of the stand-in')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', default=None, help='Write the results to this file')
+    parser.add_argument('--baseline', default=None, help='Compare against a previous --json file')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed regression against the baseline')
+    parser.add_argument('--verbose', action='store_true', help='Break Mongo operations down by collection')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main(parse_args(sys.argv[1:]))))
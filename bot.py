@@ -1,13 +1,23 @@
 import os
+import time
 import asyncio
+import importlib
 import discord
 from datetime import datetime, timezone
 from discord.ext import commands
+from discord import app_commands
 from dotenv import load_dotenv
 from utils.mongo import db
-from keep_alive import keep_alive
-
-keep_alive()
+from utils.looplag import LoopLagMonitor, StallWatchdog
+from utils.profiling import SlowCalls
+from utils.settings_cache import settings_cache
+from utils.migrations import run_migrations
+from utils.entitlements import ProRequired
+from utils.writebehind import write_behind
+from utils.procstats import rss_mb
+from utils import cluster, metrics
+from utils.healthserver import HEALTH_PORT, HealthServer, bot_readiness
+from utils.startup import StartupTimer, load_cogs as load_cog_modules, sync_commands
 
 # Load environment variables
 load_dotenv()
@@ -22,58 +32,177 @@ try:
 except Exception:
     APPLICATION_ID = 0
 
-if not TOKEN:
-    print("❌ ERROR: DISCORD_TOKEN not set in .env")
-    exit(1)
-
-if APPLICATION_ID == 0:
-    print("❌ ERROR: APPLICATION_ID missing or invalid in .env")
-    exit(1)
-
-print(f"🔑 Using Application ID: {APPLICATION_ID}")
-print(f"🛠️ Test Guild ID: {TEST_GUILD_ID}")
+# "lean" enables only the intents the cogs declare and skips member chunking
+GATEWAY_MODE = os.getenv("GATEWAY_MODE", "full").lower()
+# Phase timings up to the first command, printed on first ready and exported as metrics
+startup = StartupTimer()
 
-# Set up intents and bot with application_id to avoid sync errors
-intents = discord.Intents.all()
-bot = commands.Bot(command_prefix="!", intents=intents, application_id=APPLICATION_ID)
 
+def cog_modules():
+    return [f"cogs.{filename[:-3]}" for filename in sorted(os.listdir("./cogs")) if filename.endswith(".py")]
 
-@bot.event
-async def on_ready():
-    bot.launch_time = datetime.now(timezone.utc)
-    print(f"✅ Bot ready as {bot.user}")
-    print("🗃️ Feedback count:", db.feedback.count_documents({}))
 
-    if TEST_GUILD_ID:
+def declared_intents():
+    """Union of the INTENTS each cog module declares."""
+    intents = discord.Intents.none()
+    for name in cog_modules():
         try:
-            guild = bot.get_guild(TEST_GUILD_ID)
-            if guild is None:
-                guild = discord.Object(id=TEST_GUILD_ID)
-
-            synced = await bot.tree.sync(guild=guild)
-            print(f"✅ Synced {len(synced)} commands to test guild ({TEST_GUILD_ID})")
+            module = importlib.import_module(name)
         except Exception as e:
-            print(f"❌ Sync failed: {e}")
-    # If TEST_GUILD_ID not set or zero, skip syncing silently
+            print(f"❌ Could not read intents from {name}: {e}")
+            continue
+        for flag in getattr(module, "INTENTS", ()):
+            setattr(intents, flag, True)
+    return intents
+
+
+class StaffSuite(commands.AutoShardedBot):
+    async def setup_hook(self):
+        # Runs once after login; on_ready runs again on every reconnect
+        with startup.phase("command sync"):
+            await self.sync_test_guild()
+
+    async def _run_event(self, coro, event_name, *args, **kwargs):
+        # Times every event listener for DevTools' slowest-calls table
+        start = time.perf_counter()
+        try:
+            await super()._run_event(coro, event_name, *args, **kwargs)
+        finally:
+            self.slow_calls.record(f"{event_name} ({coro.__qualname__})", time.perf_counter() - start)
+
+    async def close(self):
+        # Cogs are unloaded by Bot.close; drain buffered writes after them
+        await super().close()
+        sampler = getattr(self, "gateway_sampler", None)
+        if sampler:
+            sampler.cancel()
+            await asyncio.gather(sampler, return_exceptions=True)
+        await self.health.stop()
+        self.stall_watchdog.stop()
+        await self.health_server.stop()
+        await write_behind.close()
+
+    async def on_ready(self):
+        first_ready = not hasattr(self, "launch_time")
+        self.launch_time = datetime.now(timezone.utc)
+        print(f"✅ Bot ready as {self.user}")
+        if first_ready:
+            total = startup.milestone("ready")
+            members = sum(len(g.members) for g in self.guilds)
+            print(f"🚀 Startup ({GATEWAY_MODE}): {total:.1f}s, {self.shard_count} shards, "
+                  f"{len(self.guilds)} guilds, {members} cached members, RSS {rss_mb():.0f} MiB")
+            print(f"⏱️ {startup.report()}")
+        print("🗃️ Feedback count:", await db.feedback.count_documents({}))
+
+    async def on_shard_ready(self, shard_id):
+        print(f"✅ Shard {shard_id} ready")
+
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        metrics.observe_command(interaction, "ok")
+        if "first command" not in startup.phases:
+            print(f"⏱️ First command /{command.qualified_name} completed {startup.milestone('first command'):.1f}s after start")
+        self.slow_calls.record(f"/{command.qualified_name}", (discord.utils.utcnow() - interaction.created_at).total_seconds())
+
+    async def on_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        metrics.observe_command(interaction, "error")
+        if interaction.command:
+            self.slow_calls.record(f"/{interaction.command.qualified_name}",
+                                   (discord.utils.utcnow() - interaction.created_at).total_seconds())
+        if isinstance(error, ProRequired):
+            if interaction.response.is_done():
+                return await interaction.followup.send(str(error), ephemeral=True)
+            return await interaction.response.send_message(str(error), ephemeral=True)
+        await app_commands.CommandTree.on_error(self.tree, interaction, error)
+
+    async def sync_test_guild(self):
+        """Copy global commands to the test guild and sync them if the tree changed since the last sync."""
+        # If TEST_GUILD_ID not set or zero, skip syncing silently; under launcher.py only cluster 0 syncs
+        if not TEST_GUILD_ID or cluster.CLUSTER_ID not in (None, 0):
+            return
+        guild = discord.Object(id=TEST_GUILD_ID)
+        self.tree.copy_global_to(guild=guild)
+        try:
+            synced = await sync_commands(self, guild)
+        except Exception as e:
+            return print(f"❌ Sync failed: {e}")
+        if synced is None:
+            print(f"⏭️ Command tree unchanged; skipped sync to test guild ({TEST_GUILD_ID})")
+        else:
+            print(f"✅ Synced {len(synced)} commands to test guild ({TEST_GUILD_ID})")
 
 
-async def load_cogs():
-    cogs_dir = "./cogs"
-    for filename in os.listdir(cogs_dir):
-        if filename.endswith(".py"):
-            cog_name = f"cogs.{filename[:-3]}"
-            try:
-                await bot.load_extension(cog_name)
-                print(f"✅ Loaded {cog_name}")
-            except Exception as e:
-                print(f"❌ Failed to load {cog_name}: {e}")
+def create_bot():
+    """Build the bot. Kept out of import time: chart workers (spawned processes) re-import this module."""
+    # Set up intents and bot with application_id to avoid sync errors
+    if GATEWAY_MODE == "lean":
+        with startup.phase("intents"):
+            intents = declared_intents()
+        # Members are fetched on demand (utils/members.py) instead of chunked at startup
+        bot_options = {
+            "chunk_guilds_at_startup": False,
+            "max_messages": int(os.getenv("LEAN_MAX_MESSAGES", 200)),
+        }
+    else:
+        intents = discord.Intents.all()
+        # Audit logs read message content from Logging's own per-guild cache, not discord.py's shared deque
+        bot_options = {"max_messages": None}
+    # Under launcher.py each cluster runs only its shard range; standalone, Discord's recommended count
+    bot = StaffSuite(
+        command_prefix="!", intents=intents, application_id=APPLICATION_ID,
+        shard_count=cluster.SHARD_COUNT, shard_ids=cluster.SHARD_IDS, http_trace=metrics.rest_trace(), **bot_options
+    )
+    bot.tree.error(bot.on_app_command_error)
+    # Event-loop lag sampler; /ping reports it so blocking regressions are visible
+    bot.loop_monitor = LoopLagMonitor()
+    bot.health = cluster.ClusterHealth(bot)
+    # Stack capture of loop stalls and the slowest commands/listeners, shown by /profiler
+    bot.stall_watchdog = StallWatchdog(threshold=float(os.getenv("STALL_THRESHOLD", 0.5)))
+    bot.slow_calls = SlowCalls()
+    # Clusters serve /livez, /readyz and /metrics on the ports after the launcher's
+    bot.health_server = HealthServer(
+        bot_readiness(bot), port=HEALTH_PORT if cluster.CLUSTER_ID is None else HEALTH_PORT + 1 + cluster.CLUSTER_ID,
+        alive=lambda: not bot.is_closed()
+    )
+    return bot
+
+
+async def load_cogs(bot):
+    with startup.phase("cogs"):
+        await load_cog_modules(bot, cog_modules(), startup)
 
 
 async def main():
+    bot = create_bot()
     async with bot:
-        await load_cogs()
+        bot.loop_monitor.start()
+        bot.stall_watchdog.start()
+        with startup.phase("health server"):
+            await bot.health_server.start()
+        # The launcher migrates once before starting its clusters
+        if cluster.CLUSTER_ID is None:
+            with startup.phase("migrations"):
+                await run_migrations()
+        bot.health.start()
+        bot.gateway_sampler = asyncio.create_task(metrics.sample_gateway(bot))
+        settings_cache.start()
+        with startup.phase("write-behind"):
+            await write_behind.start()
+        await load_cogs(bot)
         await bot.start(TOKEN)
 
 
 if __name__ == "__main__":
+    if not TOKEN:
+        print("❌ ERROR: DISCORD_TOKEN not set in .env")
+        exit(1)
+
+    if APPLICATION_ID == 0:
+        print("❌ ERROR: APPLICATION_ID missing or invalid in .env")
+        exit(1)
+
+    print(f"🔑 Using Application ID: {APPLICATION_ID}")
+    print(f"🛠️ Test Guild ID: {TEST_GUILD_ID}")
+    print(f"📡 Gateway mode: {GATEWAY_MODE}")
+    if cluster.CLUSTER_ID is not None:
+        print(f"🧩 Cluster {cluster.CLUSTER_ID}: shards {cluster.SHARD_IDS} of {cluster.SHARD_COUNT}")
     asyncio.run(main())
@@ -1,42 +1,49 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.mongo import db
+from utils.writebehind import write_behind
+from utils import sessions, rollups
+from utils.settings_cache import settings_cache
+from utils.deadlines import as_utc
+from utils.coalesce import CoalescingRefresher
+from utils.members import ensure_members
 from datetime import datetime
-import asyncio
+
+# Lean-mode intents: members for display names on the board
+INTENTS = ('guilds', 'members')
+
+# Room per board page; Discord caps an embed description at 4096 characters
+BOARD_PAGE_CHARS = 4000
 
 class Attendance(commands.Cog):
     """Manage sign-in/out and present staff embed with real-time updates."""
     
     def __init__(self, bot):
         self.bot = bot
-        self.update_lock = asyncio.Lock()
-        self.update_scheduled = {}
-        # Cache last embed content hashes to avoid unnecessary edits
+        # One worker refreshes boards for every guild, coalescing bursts of changes
+        self.refresher = CoalescingRefresher(self.update_present_for_guild, name='Attendance')
+        self.refresher.start()
+        # Cache last embed content hashes per board page to avoid unnecessary edits
         self.last_embed_hash = {}
-    
-    async def schedule_update(self, guild_id):
-        """Debounce multiple updates within 3 seconds for the same guild."""
-        async with self.update_lock:
-            if self.update_scheduled.get(guild_id):
-                return
-            self.update_scheduled[guild_id] = True
 
-        await asyncio.sleep(3)  # debounce delay
+    async def cog_unload(self):
+        await self.refresher.stop()
 
-        await self.update_present_for_guild(guild_id)
-
-        async with self.update_lock:
-            self.update_scheduled[guild_id] = False
+    def schedule_update(self, guild_id):
+        """Mark the guild's board dirty; the refresher debounces and redraws it."""
+        self.refresher.mark(guild_id)
 
     async def update_present_for_guild(self, guild_id):
-        cfg = db.settings.find_one({'guild_id': guild_id})
+        cfg = await settings_cache.get(guild_id)
         if not cfg:
             print(f"[Attendance] No config found for guild {guild_id}")
             return
 
         channel_id = cfg.get('attendance_channel')
-        message_id = cfg.get('attendance_message_id')  # saved message to edit
+        # Saved board messages to edit, one per page (older configs stored a single id)
+        message_ids = cfg.get('attendance_message_ids')
+        if message_ids is None:
+            message_ids = [cfg['attendance_message_id']] if cfg.get('attendance_message_id') else []
 
         if not channel_id:
             print(f"[Attendance] attendance_channel missing for guild {guild_id}")
@@ -47,82 +54,82 @@ class Attendance(commands.Cog):
             print(f"[Attendance] Cannot find channel ID {channel_id}")
             return
 
-        # Fetch the persistent embed message or send one if missing
-        message = None
-        if message_id:
-            try:
-                message = await channel.fetch_message(message_id)
-            except discord.NotFound:
-                message = None
-
-        # Gather present users (signed in but not signed out)
-        now = datetime.utcnow()
-        signin_logs = list(db.logs.find({'guild_id': guild_id, 'type': 'signin'}))
-
-        present_users = []
-        for log in signin_logs:
-            user_id = log['user_id']
-            signout = db.logs.find_one({
-                'user_id': user_id,
-                'guild_id': guild_id,
-                'type': 'signout',
-                'timestamp': {'$gte': log['timestamp']}
-            })
-            if signout:
-                continue
-            present_users.append((user_id, log['timestamp']))
-
-        # Build embed
-        embed = discord.Embed(
-            title="📋 Staff Attendance - Currently Signed In",
-            description=f"Updated at {now.strftime('%Y-%m-%d %H:%M:%S UTC')}",
-            color=discord.Color.blue()
-        )
-        embed.set_footer(text="⏰ Attendance bot | Updates every sign-in/out")
-        if self.bot.user.avatar:
-            embed.set_thumbnail(url=self.bot.user.avatar.url)
-
-        if not present_users:
-            embed.add_field(name="❌ No one is signed in", value="Enjoy your break! 🎉", inline=False)
-        else:
-            guild = self.bot.get_guild(guild_id)
-            for user_id, start_time in present_users:
-                member = guild.get_member(user_id) if guild else None
-                display_name = member.display_name if member else f"User ID {user_id}"
-
-                duration = now - start_time
-                duration_str = str(duration).split('.')[0]  # trim microseconds
-
-                embed.add_field(
-                    name=f"👤 {display_name}",
-                    value=(
-                        f"🕒 **Since:** {start_time.strftime('%H:%M:%S UTC')}\n"
-                        f"⏳ **Duration:** {duration_str}"
-                    ),
-                    inline=False  # full-width field
-                )
-
-        # Avoid unnecessary edits
-        embed_hash = hash(str(embed.to_dict()))
-        if message and self.last_embed_hash.get(guild_id) == embed_hash:
-            return
-        self.last_embed_hash[guild_id] = embed_hash
-
-        if message:
-            try:
-                await message.edit(embed=embed)
-            except discord.Forbidden:
-                print(f"[Attendance] Missing permissions to edit message in channel {channel_id}")
-        else:
-            try:
+        # Gather present users from the open-session index
+        present_users = [(s['user_id'], s['started_at']) for s in await sessions.present(guild_id)]
+        await ensure_members(self.bot.get_guild(guild_id), [user_id for user_id, _ in present_users])
+        pages = self.build_board(guild_id, present_users)
+
+        # Pages only change on sign-in/out (durations render client-side), so
+        # unchanged pages are skipped and changed ones are edited without a fetch
+        old_hashes = self.last_embed_hash.get(guild_id, [])
+        new_ids, new_hashes, stale = [], [], message_ids[len(pages):]
+        reposting = False
+        try:
+            for i, embed in enumerate(pages):
+                embed_hash = hash(str(embed.to_dict()))
+                new_hashes.append(embed_hash)
+                if i < len(message_ids) and not reposting:
+                    if i < len(old_hashes) and old_hashes[i] == embed_hash:
+                        new_ids.append(message_ids[i])
+                        continue
+                    try:
+                        await channel.get_partial_message(message_ids[i]).edit(embed=embed)
+                        new_ids.append(message_ids[i])
+                        continue
+                    except discord.NotFound:
+                        # Re-post this page and everything after it to keep the order
+                        reposting = True
+                        stale = message_ids[i + 1:]
                 new_message = await channel.send(embed=embed)
-                db.settings.update_one({'guild_id': guild_id}, {'$set': {'attendance_message_id': new_message.id}})
-            except discord.Forbidden:
-                print(f"[Attendance] Missing permissions to send message in channel {channel_id}")
+                new_ids.append(new_message.id)
+            for message_id in stale:
+                try:
+                    await channel.get_partial_message(message_id).delete()
+                except discord.NotFound:
+                    pass
+        except discord.Forbidden:
+            print(f"[Attendance] Missing permissions to update the board in channel {channel_id}")
+            return
+        if new_ids != message_ids:
+            await settings_cache.update(guild_id, {'attendance_message_ids': new_ids})
+        self.last_embed_hash[guild_id] = new_hashes
+
+    def build_board(self, guild_id, present_users):
+        """Render the roster as one embed per page, each within Discord's description limit."""
+        guild = self.bot.get_guild(guild_id)
+        lines = []
+        for user_id, start_time in present_users:
+            member = guild.get_member(user_id) if guild else None
+            display_name = member.display_name if member else f"User ID {user_id}"
+            ts = int(as_utc(start_time).timestamp())
+            lines.append(f"👤 **{discord.utils.escape_markdown(display_name)}** — since <t:{ts}:t> (<t:{ts}:R>)")
+        if not lines:
+            lines = ["❌ **No one is signed in** — enjoy your break! 🎉"]
+
+        chunks, chunk = [], ''
+        for line in lines:
+            if chunk and len(chunk) + 1 + len(line) > BOARD_PAGE_CHARS:
+                chunks.append(chunk)
+                chunk = line
+            else:
+                chunk = f"{chunk}\n{line}" if chunk else line
+        chunks.append(chunk)
+
+        pages = []
+        for i, description in enumerate(chunks):
+            embed = discord.Embed(description=description, color=discord.Color.blue())
+            if i == 0:
+                embed.title = "📋 Staff Attendance - Currently Signed In"
+                if self.bot.user.avatar:
+                    embed.set_thumbnail(url=self.bot.user.avatar.url)
+            page = f" | Page {i + 1}/{len(chunks)}" if len(chunks) > 1 else ""
+            embed.set_footer(text=f"⏰ {len(present_users)} signed in{page} | Updates every sign-in/out")
+            pages.append(embed)
+        return pages
 
     @app_commands.command(name="signin", description="Sign in to start your duty timer.")
     async def signin(self, interaction: discord.Interaction):
-        cfg = db.settings.find_one({'guild_id': interaction.guild.id})
+        cfg = await settings_cache.get(interaction.guild.id)
         role_name = cfg.get('staff_role') if cfg else None
         if not role_name:
             return await interaction.response.send_message(
@@ -138,7 +145,13 @@ class Attendance(commands.Cog):
             )
 
         now = datetime.utcnow()
-        db.logs.insert_one({
+        if not await sessions.open_session(interaction.guild.id, interaction.user.id, now):
+            return await interaction.response.send_message(
+                "⚠️ You are already signed in.",
+                ephemeral=True
+            )
+
+        write_behind.insert('logs', {
             'user_id': interaction.user.id,
             'guild_id': interaction.guild.id,
             'type': 'signin',
@@ -150,26 +163,34 @@ class Attendance(commands.Cog):
             ephemeral=True
         )
 
-        await self.schedule_update(interaction.guild.id)
+        self.schedule_update(interaction.guild.id)
 
     @app_commands.command(name="signout", description="Sign out and record your work summary.")
     @app_commands.describe(report="Brief summary of your work")
     async def signout(self, interaction: discord.Interaction, report: str):
         now = datetime.utcnow()
-        db.logs.insert_one({
+        session = await sessions.close_session(interaction.guild.id, interaction.user.id)
+        if not session:
+            return await interaction.response.send_message(
+                "⚠️ You are not signed in.",
+                ephemeral=True
+            )
+
+        write_behind.insert('logs', {
             'user_id': interaction.user.id,
             'guild_id': interaction.guild.id,
             'type': 'signout',
             'timestamp': now,
             'report': report
         })
+        await rollups.record_session(interaction.guild.id, interaction.user.id, session['started_at'], now)
 
         await interaction.response.send_message(
             f"✅ {interaction.user.display_name} signed out at {now.strftime('%H:%M:%S UTC')}. Report saved.",
             ephemeral=True
         )
 
-        await self.schedule_update(interaction.guild.id)
+        self.schedule_update(interaction.guild.id)
 
 
 async def setup(bot):
@@ -1,16 +1,27 @@
-import os
+import io
 import discord
 from discord.ext import commands
 from discord import app_commands
+from utils.settings_cache import settings_cache
+from utils.writebehind import write_behind
+from utils.profiling import ProfileSession
+from utils.startup import sync_commands
+
+INTENTS = ('guilds',)
+
+DEV_ID = 812347860128497694
 
 class DevTools(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.profile_session = None
+
+    profiler = app_commands.Group(name="profiler", description="Profile the event loop and find slow handlers.")
 
     @app_commands.command(name="resync", description="Reload a cog (optional) and sync slash commands.")
     @app_commands.describe(cog="Optional: Cog to reload (e.g., cogs.example)")
     async def resync(self, interaction: discord.Interaction, cog: str = None):
-        if interaction.user.id != 812347860128497694:
+        if interaction.user.id != DEV_ID:
             return await interaction.response.send_message("Unauthorized", ephemeral=True)
 
         await interaction.response.defer(ephemeral=True)
@@ -24,11 +35,85 @@ class DevTools(commands.Cog):
                 return await interaction.followup.send(f"❌ Reload failed:\n```py\n{e}\n```", ephemeral=True)
 
         try:
-            synced = await self.bot.tree.sync(guild=interaction.guild)
+            # Forced, and recorded so the next startup does not sync the same tree again
+            synced = await sync_commands(self.bot, interaction.guild, force=True)
             await interaction.followup.send(f"✅ Synced {len(synced)} commands to `{interaction.guild.name}`", ephemeral=True)
         except Exception as e:
             await interaction.followup.send(f"❌ Sync failed:\n```py\n{e}\n```", ephemeral=True)
 
+    @app_commands.command(name="stats", description="Show internal cache and queue counters.")
+    async def stats(self, interaction: discord.Interaction):
+        if interaction.user.id != DEV_ID:
+            return await interaction.response.send_message("Unauthorized", ephemeral=True)
+
+        sections = {"🗄️ Settings cache": settings_cache.stats(), "📥 Write-behind": write_behind.stats()}
+        logging_cog = self.bot.get_cog("Logging")
+        if logging_cog:
+            sections["📨 Mod-log dispatcher"] = logging_cog.dispatcher.stats()
+            sections["🧾 Audit cache"] = logging_cog.audit.stats()
+        voice_cog = self.bot.get_cog("Voice")
+        if voice_cog:
+            sections["🎙️ Voice sessions"] = voice_cog.tracker.stats()
+
+        msg = ""
+        for title, stats in sections.items():
+            lines = "\n".join(f"{k}: {v}" for k, v in stats.items())
+            msg += f"**{title}**\n```\n{lines}\n```\n"
+        await interaction.response.send_message(msg, ephemeral=True)
+
+    @profiler.command(name="start", description="Start profiling the event loop.")
+    @app_commands.describe(mode="cprofile: exact call counts (slower); sampling: stack samples for a flame graph")
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="cProfile", value="cprofile"),
+        app_commands.Choice(name="Sampling", value="sampling"),
+    ])
+    async def profile_start(self, interaction: discord.Interaction, mode: str = "sampling"):
+        if interaction.user.id != DEV_ID:
+            return await interaction.response.send_message("Unauthorized", ephemeral=True)
+        if self.profile_session:
+            return await interaction.response.send_message("⚠️ A profile is already running; `/profiler stop` it first.", ephemeral=True)
+        self.profile_session = ProfileSession(mode)
+        await interaction.response.send_message(f"⏺️ {mode} profile started.", ephemeral=True)
+
+    @profiler.command(name="stop", description="Stop profiling and upload the result.")
+    async def profile_stop(self, interaction: discord.Interaction):
+        if interaction.user.id != DEV_ID:
+            return await interaction.response.send_message("Unauthorized", ephemeral=True)
+        if not self.profile_session:
+            return await interaction.response.send_message("⚠️ No profile is running.", ephemeral=True)
+        session, self.profile_session = self.profile_session, None
+        filename, data, summary = session.stop()
+        await interaction.response.send_message(
+            f"```\n{summary[:1900]}\n```", file=discord.File(io.BytesIO(data), filename), ephemeral=True
+        )
+
+    @profiler.command(name="slowest", description="Slowest commands and event listeners since startup.")
+    async def profile_slowest(self, interaction: discord.Interaction):
+        if interaction.user.id != DEV_ID:
+            return await interaction.response.send_message("Unauthorized", ephemeral=True)
+        rows = self.bot.slow_calls.top(15)
+        if not rows:
+            return await interaction.response.send_message("Nothing recorded yet.", ephemeral=True)
+        lines = [f"{'max ms':>8} {'mean ms':>8} {'calls':>6}  name"]
+        lines += [f"{worst * 1000:>8.0f} {mean * 1000:>8.1f} {count:>6}  {name}" for name, count, mean, worst in rows]
+        await interaction.response.send_message("```\n" + "\n".join(lines)[:1990] + "\n```", ephemeral=True)
+
+    @profiler.command(name="stalls", description="Recent event-loop stalls with the stack that caused them.")
+    async def profile_stalls(self, interaction: discord.Interaction):
+        if interaction.user.id != DEV_ID:
+            return await interaction.response.send_message("Unauthorized", ephemeral=True)
+        watchdog = self.bot.stall_watchdog
+        if not watchdog.stalls:
+            return await interaction.response.send_message(
+                f"✅ No stalls over {watchdog.threshold}s since startup.", ephemeral=True)
+        report = "\n\n".join(
+            f"{when:%Y-%m-%d %H:%M:%S} UTC, blocked {seconds:.2f}s\n{stack}" for when, seconds, stack in reversed(watchdog.stalls)
+        )
+        await interaction.response.send_message(
+            f"🐢 {len(watchdog.stalls)} recent stalls over {watchdog.threshold}s (newest first).",
+            file=discord.File(io.BytesIO(report.encode()), "stalls.txt"), ephemeral=True
+        )
+
     @app_commands.command(name="find", description="Find which cog file owns a slash command, or list all commands.")
     @app_commands.describe(command_name="The command name to find (optional). Use 'all' to list all commands.")
     async def find(self, interaction: discord.Interaction, command_name: str = None):
@@ -91,14 +176,3 @@ class DevTools(commands.Cog):
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(DevTools(bot))
-
-    # 🔧 Register to test guild at load
-    test_guild_id = os.getenv("TEST_GUILD_ID")
-    if test_guild_id:
-        try:
-            guild_obj = discord.Object(id=int(test_guild_id))
-            bot.tree.copy_global_to(guild=guild_obj)
-            await bot.tree.sync(guild=guild_obj)
-            print("✅ Slash commands synced to test guild.")
-        except Exception as e:
-            print(f"❌ Error syncing to test guild: {e}")
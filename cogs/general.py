@@ -2,50 +2,85 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from utils.mongo import db
+from utils.settings_cache import settings_cache
+from utils.writebehind import write_behind
+from utils.cluster import cluster_health
 from datetime import datetime
 
+INTENTS = ('guilds',)
+
 class General(commands.Cog):
     """General user commands."""
     def __init__(self, bot): self.bot = bot
 
     @app_commands.command(name='profile', description='View your activity profile.')
     async def profile(self, interaction: discord.Interaction):
-        logs = db.logs.count_documents({'user_id': interaction.user.id, 'guild_id': interaction.guild.id})
-        vclogs = db.voice_logs.count_documents({'user_id': interaction.user.id, 'guild_id': interaction.guild.id})
+        logs = await db.logs.count_documents({'user_id': interaction.user.id, 'guild_id': interaction.guild.id})
+        pipeline = [
+            {'$match': {'user_id': interaction.user.id, 'guild_id': interaction.guild.id}},
+            {'$group': {'_id': None, 'sessions': {'$sum': 1}, 'seconds': {'$sum': '$seconds'}}},
+        ]
+        voice = (await (await db.voice_logs.aggregate(pipeline)).to_list(None) or [{'sessions': 0, 'seconds': 0}])[0]
+        voice_text = f"{voice['seconds'] / 3600:.1f} h over {voice['sessions']} sessions"
+        # The session in progress is only in the Voice cog's memory until it closes
+        voice_cog = self.bot.get_cog('Voice')
+        live = voice_cog.tracker.sessions.get((interaction.guild.id, interaction.user.id)) if voice_cog else None
+        if live:
+            voice_text += f"\n🎙️ In voice for {self.format_duration(datetime.utcnow() - live.started_at)}"
         embed = discord.Embed(title=f"Profile: {interaction.user.display_name}", color=0x00AAFF)
         embed.set_thumbnail(url=interaction.user.display_avatar.url)
         embed.add_field(name='Log Entries', value=str(logs), inline=True)
-        embed.add_field(name='Voice Events', value=str(vclogs), inline=True)
+        embed.add_field(name='Voice Time', value=voice_text, inline=True)
         embed.set_footer(text=f"As of {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}")
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command(name='ping', description='Check bot latency.')
     async def ping(self, interaction: discord.Interaction):
-        await interaction.response.send_message(f"🏓 Pong: {round(self.bot.latency*1000)}ms", ephemeral=True)
+        msg = f"🏓 Pong: {round(self.bot.latency*1000)}ms"
+        monitor = getattr(self.bot, 'loop_monitor', None)
+        if monitor:
+            lag = monitor.summary()
+            msg += f"\n🔄 Loop lag p50/p99/max: {lag['p50_ms']}/{lag['p99_ms']}/{lag['max_ms']}ms (blocked {lag['blocked_s']}s total)"
+        await interaction.response.send_message(msg, ephemeral=True)
 
-    @app_commands.command(name='uptime', description='Show how long the bot has been running.')
+    @app_commands.command(name='uptime', description='Show how long the bot and each shard have been running.')
     async def uptime(self, interaction: discord.Interaction):
-        delta = datetime.utcnow() - self.bot.launch_time
-        hours, remainder = divmod(int(delta.total_seconds()), 3600)
-        minutes, seconds = divmod(remainder, 60)
+        now = discord.utils.utcnow()
         embed = discord.Embed(
             title="🕒 Bot Uptime",
-            description=f"`{hours}h {minutes}m {seconds}s`",
+            description=f"This cluster: `{self.format_duration(now - self.bot.launch_time)}`",
             color=discord.Color.blue()
         )
-        embed.set_footer(text="Running since " + self.bot.launch_time.strftime("%Y-%m-%d %H:%M:%S UTC"))
+        # One field per cluster from the health reports every cluster writes to Mongo
+        for doc in (await cluster_health())[:25]:
+            if doc['stale']:
+                lines = [f"❌ No report for {self.format_duration(now - doc['updated_at'])}"]
+            else:
+                lines = [f"Up `{self.format_duration(now - doc['started_at'])}` · {doc['guilds']} guilds · loop p99 {doc['loop_lag_p99_ms']}ms"]
+            for shard in doc['shards']:
+                latency = f"{shard['latency_ms']}ms" if shard['latency_ms'] is not None else 'connecting'
+                lines.append(f"{'🟢' if shard['up'] else '🔴'} Shard {shard['id']}: {latency}")
+            value = "\n".join(lines)
+            embed.add_field(name=f"Cluster {doc['_id']}", value=value if len(value) <= 1024 else value[:1020] + "\n…", inline=True)
+        embed.set_footer(text=f"{self.bot.shard_count} shards · running since " + self.bot.launch_time.strftime("%Y-%m-%d %H:%M:%S UTC"))
         await interaction.response.send_message(embed=embed)
 
+    @staticmethod
+    def format_duration(delta):
+        hours, remainder = divmod(int(delta.total_seconds()), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        return f"{hours}h {minutes}m {seconds}s"
+
     @app_commands.command(name='feedback', description='Submit feedback to admins.')
     @app_commands.describe(message='Your feedback message')
     async def feedback(self, interaction: discord.Interaction, message: str):
-        db.feedback.insert_one({
+        write_behind.insert('feedback', {
             'user_id': interaction.user.id,
             'guild_id': interaction.guild.id,
             'message': message,
             'timestamp': datetime.utcnow()
         })
-        settings = db.settings.find_one({'guild_id': interaction.guild.id}) or {}
+        settings = await settings_cache.get(interaction.guild.id) or {}
         chan_id = settings.get('feedback_channel')
         if chan_id:
             chan = self.bot.get_channel(chan_id)
@@ -55,7 +90,7 @@ class General(commands.Cog):
 
     @app_commands.command(name='rules', description='Show server rules.')
     async def rules(self, interaction: discord.Interaction):
-        rec = db.settings.find_one({'guild_id': interaction.guild.id}) or {}
+        rec = await settings_cache.get(interaction.guild.id) or {}
         text = rec.get('rules_text', 'No rules set yet.')
         await interaction.response.send_message(text, ephemeral=True)
 
@@ -1,19 +1,42 @@
 import discord
-from discord.ext import commands
-from utils.mongo import db
+from discord.ext import commands, tasks
+from utils.settings_cache import settings_cache
+from utils.dispatch import ChannelDispatcher
+from utils.auditcache import AuditCache
+
+# Member join/leave events plus message events with content for delete/edit logs
+INTENTS = ('guilds', 'members', 'guild_messages', 'message_content')
 
 class Logging(commands.Cog):
     """Event logging: joins, leaves, deletes, edits."""
     def __init__(self, bot):
         self.bot = bot
+        # Coalesces bursts (raids, purges) into a few multi-line messages
+        self.dispatcher = ChannelDispatcher()
+        # Content of recent messages per guild, so raw delete/edit events can be logged
+        self.audit = AuditCache()
+        if self.audit.spill:
+            self.flush_spill.start()
+
+    async def cog_unload(self):
+        self.flush_spill.cancel()
+        await self.dispatcher.close()
+        await self.audit.close()
+
+    @tasks.loop(seconds=10)
+    async def flush_spill(self):
+        try:
+            await self.audit.spill.flush()
+        except Exception as e:
+            print(f"⚠️ Audit spill flush failed: {e}")
 
     async def log_event(self, guild_id, message):
-        rec = db.settings.find_one({'guild_id': guild_id}) or {}
+        rec = await settings_cache.get(guild_id) or {}
         log_channel_id = rec.get('mod_logs')
         if log_channel_id:
             ch = self.bot.get_channel(log_channel_id)
             if ch:
-                await ch.send(message)
+                self.dispatcher.enqueue(ch, message)
 
     @commands.Cog.listener()
     async def on_member_join(self, member):
@@ -24,16 +47,45 @@ class Logging(commands.Cog):
         await self.log_event(member.guild.id, f"🚪 {member.mention} left.")
 
     @commands.Cog.listener()
-    async def on_message_delete(self, message):
-        if message.author.bot: return
-        await self.log_event(message.guild.id,
-            f"🗑️ Message deleted in {message.channel.mention} by {message.author.mention}: {message.content}")
+    async def on_guild_remove(self, guild):
+        self.audit.forget_guild(guild.id)
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.guild is None or message.author.bot: return
+        self.audit.put(message.guild.id, message.id, message.channel.id, message.author.id, message.content)
+
+    # Raw events fire whether or not discord.py still caches the message; content comes from the audit cache
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        if payload.guild_id is None: return
+        entry = await self.audit.pop(payload.guild_id, payload.message_id)
+        if entry is None: return
+        await self.log_event(payload.guild_id,
+            f"🗑️ Message deleted in <#{entry.channel_id}> by <@{entry.author_id}>: {entry.content}")
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload):
+        if payload.guild_id is None: return
+        for message_id in sorted(payload.message_ids):
+            entry = await self.audit.pop(payload.guild_id, message_id)
+            if entry:
+                await self.log_event(payload.guild_id,
+                    f"🗑️ Message bulk-deleted in <#{entry.channel_id}> by <@{entry.author_id}>: {entry.content}")
 
     @commands.Cog.listener()
-    async def on_message_edit(self, before, after):
-        if before.author.bot or before.content == after.content: return
-        await self.log_event(before.guild.id,
-            f"✏️ Message edited by {before.author.mention} in {before.channel.mention}:\n"+
-            f"**Before:** {before.content}\n**After:** {after.content}")
+    async def on_raw_message_edit(self, payload):
+        author, content = payload.data.get('author') or {}, payload.data.get('content')
+        if payload.guild_id is None or content is None or author.get('bot'): return
+        before = await self.audit.edit(payload.guild_id, payload.message_id, content)
+        if before is None:
+            # Not seen before (sent before startup or evicted): remember it from now on
+            if author:
+                self.audit.put(payload.guild_id, payload.message_id, payload.channel_id, int(author['id']), content)
+            return
+        if before == content: return
+        await self.log_event(payload.guild_id,
+            f"✏️ Message edited by <@{author['id']}> in <#{payload.channel_id}>:\n"+
+            f"**Before:** {before}\n**After:** {content}")
 
 async def setup(bot): await bot.add_cog(Logging(bot))
\ No newline at end of file
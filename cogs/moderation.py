@@ -2,9 +2,11 @@ import os
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.mongo import db
+from utils.writebehind import write_behind
 from datetime import datetime
 
+INTENTS = ('guilds',)
+
 OWNER_ID = int(os.getenv('OWNER_ID', '0'))
 
 def is_owner(interaction: discord.Interaction) -> bool:
@@ -19,7 +21,7 @@ class Moderation(commands.Cog):
     @app_commands.describe(member='User to warn', reason='Reason for warning')
     async def warn(self, interaction: discord.Interaction, member: discord.Member, reason: str):
         now = datetime.utcnow()
-        db.infractions.insert_one({'guild_id': interaction.guild.id,'user_id': member.id,'moderator': interaction.user.id,'reason': reason,'timestamp': now})
+        write_behind.insert('infractions', {'guild_id': interaction.guild.id,'user_id': member.id,'moderator': interaction.user.id,'reason': reason,'timestamp': now})
         await member.send(f"⚠️ You have been warned: {reason}")
         await interaction.response.send_message(f"✅ {member.mention} has been warned.", ephemeral=True)
 
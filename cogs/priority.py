@@ -4,11 +4,24 @@ import random
 from discord.ext import commands, tasks
 from discord import app_commands
 from utils.mongo import db
-from datetime import datetime, timedelta
-from croniter import croniter
+from utils.settings_cache import settings_cache
+from utils.deadlines import DeadlineScheduler, as_utc, next_cron_run
+from utils.entitlements import entitlements, pro_required
+from utils.broadcast import BroadcastManager
+from utils.cluster import owns
+from utils import metrics
+from datetime import datetime, timedelta, timezone
+
+# members: Staff role holders for /bulk_notify
+INTENTS = ('guilds', 'members')
 
 OWNER_ID = int(os.getenv('OWNER_ID', '0'))
 PRIOTEST_CHANNEL_ID = int(os.getenv('PRIOTEST', '0'))
+KEY_WARN_BEFORE = timedelta(hours=1)
+# check_keys loads deadlines this far ahead; must exceed its loop interval
+KEY_HORIZON = timedelta(hours=6)
+# _schedule_reports loads schedules this far ahead; must exceed its loop interval
+SCHEDULE_HORIZON = timedelta(hours=1)
 
 def is_owner(interaction: discord.Interaction) -> bool:
     return interaction.user.id == OWNER_ID
@@ -17,11 +30,34 @@ class Priority(commands.Cog):
     """Manage subscription keys and Pro activation."""
     def __init__(self, bot):
         self.bot = bot
+        # Key warn/expire deadlines; sleeps until the next one is due
+        self.expiry = DeadlineScheduler(self._key_deadline, name='Priority')
+        self.expiry.start()
         self.check_keys.start()
-        self.schedule_reports = tasks.loop(minutes=1)(self._schedule_reports)
+        # Scheduled reports keyed by schedule _id, ordered by their precomputed next_run
+        self.reports = DeadlineScheduler(self._report_due, name='Reports')
+        self.reports.start()
+        self.schedule_reports = tasks.loop(minutes=30)(self._schedule_reports)
+        self.schedule_reports.before_loop(self.wait_ready)
         self.schedule_reports.start()
+        self.broadcasts = BroadcastManager(bot)
+
+    async def cog_load(self):
+        await entitlements.load()
+        self.broadcasts.resume()
+
+    async def cog_unload(self):
+        self.check_keys.cancel()
+        self.schedule_reports.cancel()
+        self.expiry.stop()
+        self.reports.stop()
+        await self.broadcasts.stop()
+
+    def prio_channel(self):
+        # Partial channel: the log channel may be on another cluster's shard
+        return self.bot.get_partial_messageable(PRIOTEST_CHANNEL_ID) if PRIOTEST_CHANNEL_ID else None
 
-    def gen_key(self, duration: str, assigned_user_id: int = None) -> dict:
+    async def gen_key(self, duration: str, assigned_user_id: int = None) -> dict:
         unit_map = {'s':'seconds','m':'minutes','h':'hours','d':'days','y':'days','l':None}
         unit = duration[-1]
         amt = int(duration[:-1]) if unit != 'l' else None
@@ -38,63 +74,91 @@ class Priority(commands.Cog):
             'warned': False,
             'expired_notified': False
         }
-        db.keys.insert_one(rec)
+        await db.keys.insert_one(rec)
         return rec
 
-    @tasks.loop(minutes=1)
+    @tasks.loop(hours=3)
     async def check_keys(self):
-        now = datetime.now().astimezone()
-        prio_ch = self.bot.get_channel(PRIOTEST_CHANNEL_ID)
-        async def send_embed(embed):
-            if prio_ch:
-                await prio_ch.send(embed=embed)
-
-        for rec in db.keys.find({'used': True}):
-            guild_id = rec.get('guild_id')
-            expires = rec.get('expires_at')
-            assigned = rec.get('assigned_user_id')
-            if not expires:
-                continue
+        """Refill the expiry scheduler with key deadlines inside the next horizon."""
+        horizon = datetime.now(timezone.utc) + KEY_HORIZON
+        with metrics.TASK_TICK_SECONDS.labels('check_keys').time():
+            async for rec in db.keys.find({'used': True, 'expired_notified': False, 'expires_at': {'$lte': horizon}}):
+                # Each cluster only tracks keys of guilds on its own shards
+                if owns(self.bot, rec.get('guild_id')):
+                    self.track_key(rec)
+
+    @check_keys.before_loop
+    async def wait_ready(self):
+        # Deadlines already due fire as soon as they are scheduled, and sending needs a logged-in client
+        await self.bot.wait_until_ready()
 
-            if not rec.get('warned') and now >= expires - timedelta(hours=1) and now < expires:
-                db.keys.update_one({'_id': rec['_id']}, {'$set': {'warned': True}})
-                member_mention = f"<@{assigned}>" if assigned else "Staff"
-                embed = discord.Embed(
-                    title="⚠️ Pro Subscription Ending Soon",
-                    description=(
-                        f"Subscription for guild ID `{guild_id}` expires at "
-                        f"`{expires.strftime('%Y-%m-%d %H:%M:%S %Z')}`\n"
-                        f"Assigned to: {member_mention}\n\n"
-                        f"Renew by DMing <@{OWNER_ID}>."
-                    ),
-                    color=discord.Color.orange(),
-                    timestamp=now
-                )
-                embed.set_footer(text=f"Server ID: {guild_id}")
-                await send_embed(embed)
-
-            if not rec.get('expired_notified') and now >= expires:
-                db.keys.update_one({'_id': rec['_id']}, {'$set': {'expired_notified': True}})
-                member_mention = f"<@{assigned}>" if assigned else "Staff"
-                embed = discord.Embed(
-                    title="⏳ Pro Subscription Expired",
-                    description=(
-                        f"Subscription for guild ID `{guild_id}` expired at "
-                        f"`{expires.strftime('%Y-%m-%d %H:%M:%S %Z')}`\n"
-                        f"Assigned to: {member_mention}\n\n"
-                        f"Renew by DMing <@{OWNER_ID}>."
-                    ),
-                    color=discord.Color.dark_gold(),
-                    timestamp=now
-                )
-                embed.set_footer(text=f"Server ID: {guild_id}")
-                await send_embed(embed)
+    def track_key(self, rec):
+        """(Re)schedule the warn and expire deadlines for an activated key."""
+        self.expiry.cancel((rec['_id'], 'warn'))
+        self.expiry.cancel((rec['_id'], 'expire'))
+        expires = as_utc(rec.get('expires_at'))
+        if not rec.get('used') or expires is None or rec.get('expired_notified'):
+            return
+        if not rec.get('warned'):
+            self.expiry.schedule((rec['_id'], 'warn'), expires - KEY_WARN_BEFORE)
+        self.expiry.schedule((rec['_id'], 'expire'), expires)
+
+    async def _key_deadline(self, key, _payload):
+        key_id, kind = key
+        now = datetime.now(timezone.utc)
+        # Claim the notification atomically so it is sent once even if the key changed meanwhile
+        if kind == 'warn':
+            rec = await db.keys.find_one_and_update(
+                {'_id': key_id, 'used': True, 'warned': False, 'expires_at': {'$gt': now}},
+                {'$set': {'warned': True}}
+            )
+        else:
+            rec = await db.keys.find_one_and_update(
+                {'_id': key_id, 'used': True, 'expired_notified': False, 'expires_at': {'$lte': now}},
+                {'$set': {'expired_notified': True}}
+            )
+        if not rec:
+            return
+
+        prio_ch = self.prio_channel()
+        if not prio_ch:
+            return
+        guild_id = rec.get('guild_id')
+        expires = as_utc(rec['expires_at'])
+        assigned = rec.get('assigned_user_id')
+        member_mention = f"<@{assigned}>" if assigned else "Staff"
+        if kind == 'warn':
+            embed = discord.Embed(
+                title="⚠️ Pro Subscription Ending Soon",
+                description=(
+                    f"Subscription for guild ID `{guild_id}` expires at "
+                    f"`{expires.strftime('%Y-%m-%d %H:%M:%S %Z')}`\n"
+                    f"Assigned to: {member_mention}\n\n"
+                    f"Renew by DMing <@{OWNER_ID}>."
+                ),
+                color=discord.Color.orange(),
+                timestamp=now
+            )
+        else:
+            embed = discord.Embed(
+                title="⏳ Pro Subscription Expired",
+                description=(
+                    f"Subscription for guild ID `{guild_id}` expired at "
+                    f"`{expires.strftime('%Y-%m-%d %H:%M:%S %Z')}`\n"
+                    f"Assigned to: {member_mention}\n\n"
+                    f"Renew by DMing <@{OWNER_ID}>."
+                ),
+                color=discord.Color.dark_gold(),
+                timestamp=now
+            )
+        embed.set_footer(text=f"Server ID: {guild_id}")
+        await prio_ch.send(embed=embed)
 
     @app_commands.command(name='generate_key', description='Generate a subscription key.')
     @app_commands.check(is_owner)
     @app_commands.describe(duration='Validity (e.g., 7d,12h,1y,5l)', dm_user='Optional: user to DM the key')
     async def generate_key(self, interaction: discord.Interaction, duration: str, dm_user: discord.Member = None):
-        rec = self.gen_key(duration, assigned_user_id=dm_user.id if dm_user else None)
+        rec = await self.gen_key(duration, assigned_user_id=dm_user.id if dm_user else None)
         await interaction.response.send_message(f"🔑 Key `{rec['key']}` generated ({duration}).", ephemeral=True)
         if dm_user:
             try:
@@ -106,18 +170,20 @@ class Priority(commands.Cog):
     @app_commands.command(name='activate_key', description='Activate a subscription key for this server.')
     @app_commands.describe(key='Subscription key')
     async def activate_key(self, interaction: discord.Interaction, key: str):
-        rec = db.keys.find_one({'key': key, 'used': False})
+        rec = await db.keys.find_one({'key': key, 'used': False})
         if not rec:
             return await interaction.response.send_message('🚫 Invalid or already used key.', ephemeral=True)
 
         now = datetime.now().astimezone()
         expires = rec['expires_at']
-        db.keys.update_one({'key': key}, {'$set': {
+        await db.keys.update_one({'key': key}, {'$set': {
             'used': True,
             'activated_at': now,
             'expires_at': expires,
             'guild_id': interaction.guild.id
         }})
+        self.track_key({**rec, 'used': True, 'guild_id': interaction.guild.id})
+        await entitlements.refresh(interaction.guild.id)
 
         member_id = rec.get('assigned_user_id')
         member_mention = f"<@{member_id}>" if member_id else "Staff"
@@ -134,7 +200,7 @@ class Priority(commands.Cog):
         )
         await interaction.response.send_message(embed=embed)
 
-        prio_ch = self.bot.get_channel(PRIOTEST_CHANNEL_ID)
+        prio_ch = self.prio_channel()
         if prio_ch:
             embed2 = discord.Embed(
                 title="🔓 Pro Subscription Activated",
@@ -164,16 +230,18 @@ class Priority(commands.Cog):
         if dm_user:
             q['assigned_user_id'] = dm_user.id
 
-        rec = db.keys.find_one({**q, 'used': False})
+        rec = await db.keys.find_one({**q, 'used': False})
         if rec:
-            db.keys.delete_one({'_id': rec['_id']})
+            await db.keys.delete_one({'_id': rec['_id']})
             return await interaction.response.send_message(f"🗑️ Unused key `{rec['key']}` deleted.", ephemeral=True)
 
-        active = list(db.keys.find({**q, 'used': True}))
+        active = await db.keys.find({**q, 'used': True}).to_list(None)
         if not active:
             return await interaction.response.send_message("🚫 No matching subscription found.", ephemeral=True)
         for r in active:
-            db.keys.update_one({'_id': r['_id']}, {'$set': {'expires_at': now}})
+            await db.keys.update_one({'_id': r['_id']}, {'$set': {'expires_at': now}})
+            self.track_key({**r, 'expires_at': now})
+        await entitlements.refresh(interaction.guild.id)
         embed = discord.Embed(
             title="🛑 Pro Deactivated",
             description=f"All Pro features have been disabled for this server.\n\nTo reactivate, DM <@{OWNER_ID}>.",
@@ -182,7 +250,7 @@ class Priority(commands.Cog):
         )
         await interaction.response.send_message(embed=embed)
 
-        prio_ch = self.bot.get_channel(PRIOTEST_CHANNEL_ID)
+        prio_ch = self.prio_channel()
         if prio_ch:
             embed2 = discord.Embed(
                 title="🔒 Pro Subscription Deactivated",
@@ -193,42 +261,56 @@ class Priority(commands.Cog):
             embed2.set_footer(text=f"Deactivated by: {interaction.user.display_name}")
             await prio_ch.send(embed=embed2)
 
-    def pro_active(self, guild_id: int) -> bool:
-        rec = db.keys.find_one({'guild_id': guild_id, 'used': True})
-        return bool(rec and (rec['expires_at'] is None or rec['expires_at'] > datetime.now().astimezone()))
-
     @app_commands.command(name='bulk_notify', description='[Pro] DM all staff a message.')
+    @pro_required()
     async def bulk_notify(self, interaction: discord.Interaction, message: str):
-        if not self.pro_active(interaction.guild.id):
-            return await interaction.response.send_message('🚫 Pro not active.', ephemeral=True)
-
-        cfg = db.settings.find_one({'guild_id': interaction.guild.id})
+        # Defer first: the DMs go out in the background and progress is edited in
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        cfg = await settings_cache.get(interaction.guild.id) or {}
         role = discord.utils.get(interaction.guild.roles, name=cfg.get('staff_role', 'Staff'))
         if not role:
-            return await interaction.response.send_message("⚠️ Staff role not set.", ephemeral=True)
+            return await interaction.followup.send("⚠️ Staff role not set.", ephemeral=True)
 
-        for member in interaction.guild.members:
-            if role in member.roles:
-                try:
-                    await member.send(message)
-                except:
-                    continue
-        await interaction.response.send_message('📣 Broadcast sent.', ephemeral=True)
+        await self.broadcasts.start(interaction.guild, role, message, interaction.user, interaction)
 
     async def _schedule_reports(self):
-        now = datetime.now().astimezone()
-        for sched in db.schedules.find({}):
-            cron = sched.get('cron')
-            guild_id = sched.get('guild_id')
-            channel_id = sched.get('channel_id')
-            last_run = sched.get('last_run', now - timedelta(minutes=2))
-            iter = croniter(cron, last_run)
-            next_time = iter.get_next(datetime)
-            if now >= next_time:
-                db.schedules.update_one({'_id': sched['_id']}, {'$set': {'last_run': now}})
-                ch = self.bot.get_channel(channel_id)
-                if ch:
-                    await ch.send(sched.get('message', 'Scheduled report'))
+        """Refill the report scheduler with schedules due inside the next horizon."""
+        with metrics.TASK_TICK_SECONDS.labels('schedule_reports').time():
+            await self._refill_reports()
+
+    async def _refill_reports(self):
+        now = datetime.now(timezone.utc)
+        # Schedules inserted without next_run (null in the index) get one now
+        async for sched in db.schedules.find({'next_run': None}):
+            if not owns(self.bot, sched.get('guild_id')):
+                continue
+            next_run = next_cron_run(sched['cron'], sched.get('last_run') or now - timedelta(minutes=2))
+            await db.schedules.update_one({'_id': sched['_id'], 'next_run': None}, {'$set': {'next_run': next_run}})
+        async for sched in db.schedules.find({'next_run': {'$lte': now + SCHEDULE_HORIZON}}):
+            if owns(self.bot, sched.get('guild_id')):
+                self.reports.schedule(sched['_id'], sched['next_run'], sched)
+
+    async def _report_due(self, sched_id, sched):
+        now = datetime.now(timezone.utc)
+        # Next run is computed from now, so a long outage fires one catch-up report, not a burst
+        next_run = next_cron_run(sched['cron'], now)
+        claimed = await db.schedules.find_one_and_update(
+            {'_id': sched_id, 'next_run': sched['next_run']},
+            {'$set': {'last_run': now, 'next_run': next_run}}
+        )
+        if not claimed:
+            # A refill that read the schedule before an earlier fire claimed it can replace the
+            # fresh entry with this stale one; put the schedule's current next_run back
+            current = await db.schedules.find_one({'_id': sched_id})
+            if current and current.get('next_run') and as_utc(current['next_run']) <= now + SCHEDULE_HORIZON:
+                self.reports.schedule(sched_id, current['next_run'], current)
+            return
+        if next_run <= now + SCHEDULE_HORIZON:
+            self.reports.schedule(sched_id, next_run, {**claimed, 'next_run': next_run})
+        channel_id = claimed.get('channel_id')
+        if channel_id:
+            # Partial channel: no cache lookup that could miss and drop the claimed report
+            await self.bot.get_partial_messageable(channel_id).send(claimed.get('message', 'Scheduled report'))
 
 async def setup(bot):
     await bot.add_cog(Priority(bot))
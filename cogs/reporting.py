@@ -1,33 +1,91 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.mongo import db
-import matplotlib.pyplot as plt
+from utils import charts, rollups, timesheet
+from utils.members import ensure_members
 import io
-from datetime import datetime
+import tempfile
+from datetime import datetime, timedelta
+
+INTENTS = ('guilds', 'members')
 
 class Reporting(commands.Cog):
     """Generate attendance reports."""
     def __init__(self, bot): self.bot = bot
 
-    @app_commands.command(name='attendance_report', description='Bar chart of sign-ins per user.')
-    async def attendance_report(self, interaction: discord.Interaction):
-        pipeline = [
-            {'$match': {'guild_id': interaction.guild.id, 'type': 'signin'}},
-            {'$group': {'_id': '$user_id', 'count': {'$sum': 1}}}
-        ]
-        data = list(db.logs.aggregate(pipeline))
+    async def cog_unload(self):
+        charts.shutdown()
+
+    @app_commands.command(name='attendance_report', description='Bar chart of sign-ins or hours per user.')
+    @app_commands.describe(
+        metric='What to chart (default: sign-ins)',
+        start='First day to include, YYYY-MM-DD (default: all history)',
+        end='Last day to include, YYYY-MM-DD (default: today)'
+    )
+    @app_commands.choices(metric=[
+        app_commands.Choice(name='Sign-ins', value='sessions'),
+        app_commands.Choice(name='Hours on duty', value='hours'),
+    ])
+    async def attendance_report(self, interaction: discord.Interaction, metric: str = 'sessions',
+                                start: str = None, end: str = None):
+        try:
+            start_day = datetime.strptime(start, '%Y-%m-%d') if start else None
+            end_day = datetime.strptime(end, '%Y-%m-%d') + timedelta(days=1) if end else None
+        except ValueError:
+            return await interaction.response.send_message('⚠️ Dates must look like 2024-01-31.', ephemeral=True)
+
+        # Defer first so aggregation and rendering never hit the 3s interaction deadline
+        await interaction.response.defer()
+        # Reads the per-day rollups (closed sessions), not the raw event stream
+        data = await rollups.summarize(interaction.guild.id, start_day, end_day)
         if not data:
-            return await interaction.response.send_message('No data found.', ephemeral=True)
-        names, counts = [], []
+            # The first follow-up would replace the public "thinking" message; drop it to reply privately
+            await interaction.delete_original_response()
+            return await interaction.followup.send('No data found.', ephemeral=True)
+        await ensure_members(interaction.guild, [item['_id'] for item in data])
+        names, values = [], []
         for item in data:
             user = interaction.guild.get_member(item['_id'])
-            if user: names.append(user.display_name); counts.append(item['count'])
-        plt.figure(figsize=(8,4))
-        plt.bar(names, counts)
-        plt.xticks(rotation=45, ha='right'); plt.tight_layout()
-        buf = io.BytesIO(); plt.savefig(buf, format='png'); buf.seek(0)
-        await interaction.response.send_message(file=discord.File(buf, 'attendance.png'))
+            if user:
+                names.append(user.display_name)
+                values.append(item['sessions'] if metric == 'sessions' else round(item['seconds'] / 3600, 2))
+        ylabel = 'Sign-ins' if metric == 'sessions' else 'Hours on duty'
+        png = await charts.bar_chart(interaction.guild.id, names, values, ylabel=ylabel)
+        await interaction.followup.send(file=discord.File(io.BytesIO(png), 'attendance.png'))
+
+    @app_commands.command(name='export_timesheet', description='Export a month of duty sessions as a compressed file.')
+    @app_commands.describe(month='Month to export, YYYY-MM', format='File format (default: CSV)')
+    @app_commands.choices(format=[
+        app_commands.Choice(name='CSV', value='csv'),
+        app_commands.Choice(name='JSON Lines', value='jsonl'),
+    ])
+    @app_commands.default_permissions(manage_guild=True)
+    async def export_timesheet(self, interaction: discord.Interaction, month: str, format: str = 'csv'):
+        try:
+            start, end = timesheet.month_range(month)
+        except ValueError:
+            return await interaction.response.send_message('⚠️ Month must look like 2024-01.', ephemeral=True)
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        guild = interaction.guild
+        # Warm the member cache for this month's staff so the name column is filled
+        await ensure_members(guild, [row['_id'] for row in await rollups.summarize(guild.id, start, end)])
+
+        def member_name(user_id):
+            member = guild.get_member(user_id)
+            return member.display_name if member else ''
+
+        with tempfile.TemporaryDirectory() as tmp:
+            paths, count = await timesheet.export(
+                guild.id, start, end, tmp, format, max_bytes=guild.filesize_limit, member_name=member_name
+            )
+            if not paths:
+                return await interaction.followup.send(f'No sessions found for {month}.', ephemeral=True)
+            # Discord allows at most 10 attachments per message
+            for i in range(0, len(paths), 10):
+                files = [discord.File(p) for p in paths[i:i + 10]]
+                content = f"🧾 Timesheet for {month}: {count} sessions in {len(paths)} file(s)." if i == 0 else None
+                await interaction.followup.send(content, files=files, ephemeral=True)
 
 async def setup(bot):
-    await bot.add_cog(Reporting(bot))
\ No newline at end of file
+    await bot.add_cog(Reporting(bot))
@@ -1,24 +1,72 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import io
 from utils.mongo import db
+from utils import payroll, timesheet
+from utils.members import ensure_members
+
+INTENTS = ('guilds', 'members')
 
 class Salary(commands.Cog):
     """Manage staff salaries."""
     def __init__(self, bot): self.bot = bot
 
-    @app_commands.command(name='set_salary', description='Set monthly salary for a staff member.')
-    @app_commands.describe(member='Staff member', amount='Salary amount')
-    async def set_salary(self, interaction: discord.Interaction, member: discord.Member, amount: int):
-        db.salary.update_one({'guild_id': interaction.guild.id, 'user_id': member.id}, {'$set': {'salary': amount}}, upsert=True)
-        await interaction.response.send_message(f"💰 {member.mention}'s salary set to ₹{amount}.", ephemeral=True)
+    @app_commands.command(name='set_salary', description='Set monthly salary or hourly rate for a staff member.')
+    @app_commands.describe(member='Staff member', amount='Salary amount', pay_type='Monthly salary (default) or hourly rate')
+    @app_commands.choices(pay_type=[
+        app_commands.Choice(name='Monthly', value='monthly'),
+        app_commands.Choice(name='Hourly', value='hourly'),
+    ])
+    async def set_salary(self, interaction: discord.Interaction, member: discord.Member, amount: int, pay_type: str = 'monthly'):
+        await db.salary.update_one(
+            {'guild_id': interaction.guild.id, 'user_id': member.id}, {'$set': {'salary': amount, 'pay_type': pay_type}}, upsert=True
+        )
+        per = '/hour' if pay_type == 'hourly' else '/month'
+        await interaction.response.send_message(f"💰 {member.mention}'s salary set to ₹{amount}{per}.", ephemeral=True)
 
     @app_commands.command(name='get_salary', description='Get salary of a staff member.')
     @app_commands.describe(member='Staff member')
     async def get_salary(self, interaction: discord.Interaction, member: discord.Member):
-        rec = db.salary.find_one({'guild_id': interaction.guild.id, 'user_id': member.id})
-        msg = f"💵 {member.mention} salary is ₹{rec['salary']}" if rec else "No salary set."
+        rec = await db.salary.find_one({'guild_id': interaction.guild.id, 'user_id': member.id})
+        per = '/hour' if rec and rec.get('pay_type') == 'hourly' else ''
+        msg = f"💵 {member.mention} salary is ₹{rec['salary']}{per}" if rec else "No salary set."
         await interaction.response.send_message(msg, ephemeral=True)
 
+    @app_commands.command(name='payroll_run', description='Compute a month of pay for every salaried staff member.')
+    @app_commands.describe(
+        month='Month to pay, YYYY-MM',
+        standard_hours=f'Hours in a full month; more is overtime (default {payroll.STANDARD_HOURS})',
+        overtime=f'Overtime pay multiplier (default {payroll.OVERTIME_MULTIPLIER})',
+        prorate='Scale monthly salaries by hours worked (default: yes)'
+    )
+    @app_commands.default_permissions(manage_guild=True)
+    async def payroll_run(self, interaction: discord.Interaction, month: str,
+                          standard_hours: app_commands.Range[int, 1, 744] = payroll.STANDARD_HOURS,
+                          overtime: app_commands.Range[float, 1, 10] = payroll.OVERTIME_MULTIPLIER, prorate: bool = True):
+        try:
+            start, end = timesheet.month_range(month)
+        except ValueError:
+            return await interaction.response.send_message('⚠️ Month must look like 2024-01.', ephemeral=True)
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        guild = interaction.guild
+        result = await payroll.run(guild.id, start, end, standard_hours, overtime, prorate)
+        if result is None:
+            return await interaction.followup.send('No salaries set. Use /set_salary first.', ephemeral=True)
+        await ensure_members(guild, result['user_id'].tolist())
+
+        def member_name(user_id):
+            member = guild.get_member(user_id)
+            return member.display_name if member else ''
+
+        statement = payroll.statement_csv(result, member_name)
+        await interaction.followup.send(
+            f"🧾 Payroll for {month}: {len(result['user_id'])} staff, {result['hours'].sum():,.1f} h on duty "
+            f"({result['overtime_hours'].sum():,.1f} h overtime), total ₹{result['total'].sum():,.2f}.\n"
+            f"-# Closed duty sessions only; anyone still signed in is paid up to their last sign-out.",
+            file=discord.File(io.BytesIO(statement), f'payroll-{month}.csv'), ephemeral=True
+        )
+
 async def setup(bot):
     await bot.add_cog(Salary(bot))
\ No newline at end of file
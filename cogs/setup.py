@@ -1,7 +1,9 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.mongo import db
+from utils.settings_cache import settings_cache
+
+INTENTS = ('guilds',)
 
 class Settings(commands.Cog):
     """Configure bot: creates @Staff role and #attendance channel if not existing."""
@@ -14,7 +16,7 @@ class Settings(commands.Cog):
         guild = interaction.guild
 
         # Fetch existing config or empty dict
-        cfg = db.settings.find_one({'guild_id': guild.id}) or {}
+        cfg = await settings_cache.get(guild.id) or {}
 
         # Check or create Staff role
         role_name = cfg.get('staff_role', 'Staff')
@@ -36,11 +38,7 @@ class Settings(commands.Cog):
             channel_id = channel.id
 
         # Save/update settings in DB
-        db.settings.update_one(
-            {'guild_id': guild.id},
-            {'$set': {'staff_role': role_name, 'attendance_channel': channel_id}},
-            upsert=True
-        )
+        await settings_cache.update(guild.id, {'staff_role': role_name, 'attendance_channel': channel_id})
 
         await interaction.response.send_message(
             f"✅ Setup complete.\nRole: {role.mention}\nChannel: {channel.mention}",
@@ -0,0 +1,69 @@
+from discord.ext import commands, tasks
+from utils.voice import CHECKPOINT_INTERVAL, VoiceTracker
+
+INTENTS = ('guilds', 'voice_states')
+
+class Voice(commands.Cog):
+    """Track time spent in voice channels."""
+    def __init__(self, bot):
+        self.bot = bot
+        self.tracker = VoiceTracker()
+        self.checkpoint = tasks.loop(seconds=CHECKPOINT_INTERVAL)(self._checkpoint)
+        self.checkpoint.start()
+
+    async def cog_load(self):
+        # Reloaded while connected: on_ready will not fire again
+        if self.bot.is_ready():
+            await self.reconcile()
+
+    async def cog_unload(self):
+        self.checkpoint.cancel()
+        # Members are still in voice; keep their sessions open for the next start to reconcile
+        await self._checkpoint()
+
+    async def _checkpoint(self):
+        try:
+            await self.tracker.checkpoint()
+        except Exception as e:
+            print(f"⚠️ Voice checkpoint failed: {e}")
+
+    @staticmethod
+    def tracked_channel(state):
+        channel = state.channel
+        return channel.id if channel and channel != channel.guild.afk_channel else None
+
+    async def reconcile(self):
+        voice_states = {}
+        for guild in self.bot.guilds:
+            if guild.unavailable:
+                continue
+            states = voice_states[guild.id] = {}
+            for channel in (*guild.voice_channels, *guild.stage_channels):
+                if channel == guild.afk_channel:
+                    continue
+                for user_id in channel.voice_states:
+                    member = guild.get_member(user_id)
+                    if member is None or not member.bot:
+                        states[user_id] = channel.id
+        closed, opened = await self.tracker.reconcile(voice_states)
+        print(f"🎙️ Voice sessions reconciled: {len(self.tracker.sessions)} open, {closed} closed, {opened} found in voice")
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        await self.reconcile()
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        if member.bot: return
+        was, now = self.tracked_channel(before), self.tracked_channel(after)
+        if was == now:
+            # Mute, deafen, stream and video toggles: nothing to record
+            return
+        if was is None:
+            self.tracker.join(member.guild.id, member.id, now)
+        elif now is None:
+            self.tracker.leave(member.guild.id, member.id)
+        else:
+            self.tracker.move(member.guild.id, member.id, now)
+
+async def setup(bot): await bot.add_cog(Voice(bot))
@@ -0,0 +1,152 @@
+"""Run the bot as several clusters, each an AutoShardedBot process owning a range of shards.
+
+    python launcher.py [--clusters N] [--shards N]
+    python launcher.py --status
+
+The launcher applies migrations once, asks Discord for the recommended shard
+count (unless --shards is given), splits the shards into contiguous ranges
+and starts one `bot.py` per range with SHARD_COUNT, SHARD_IDS and CLUSTER_ID
+set. Clusters that exit are restarted with backoff; SIGINT/SIGTERM stop them all.
+The launcher's /readyz (HEALTH_PORT) is ready once every cluster reports in
+healthy; cluster N serves its own probes on HEALTH_PORT + 1 + N.
+"""
+import argparse
+import asyncio
+import math
+import os
+import signal
+import sys
+import aiohttp
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from utils.cluster import cluster_health
+from utils.mongo import db
+from utils.migrations import run_migrations
+from utils.healthserver import HealthServer, cluster_readiness
+
+# Discord allows one IDENTIFY per max_concurrency bucket every 5 seconds
+IDENTIFY_WINDOW = 5.5
+MAX_BACKOFF = 60
+
+
+async def recommended_shards(token):
+    headers = {'Authorization': f'Bot {token}'}
+    async with aiohttp.ClientSession() as session:
+        async with session.get('https://discord.com/api/v10/gateway/bot', headers=headers) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+    return data['shards'], data['session_start_limit']['max_concurrency']
+
+
+def shard_ranges(shard_count, clusters):
+    per = math.ceil(shard_count / clusters)
+    return [list(range(i, min(i + per, shard_count))) for i in range(0, shard_count, per)]
+
+
+class Cluster:
+    def __init__(self, cluster_id, shard_ids, shard_count):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.process = None
+        self.restarts = 0
+
+    def env(self):
+        env = dict(os.environ, SHARD_COUNT=str(self.shard_count),
+                   SHARD_IDS=','.join(map(str, self.shard_ids)), CLUSTER_ID=str(self.cluster_id))
+        # Each cluster keeps its own write-behind spool and audit-cache spill file
+        for name in ('WRITE_BEHIND_SPOOL', 'AUDIT_CACHE_SPILL'):
+            if env.get(name):
+                env[name] += f'.cluster{self.cluster_id}'
+        return env
+
+    async def spawn(self):
+        self.process = await asyncio.create_subprocess_exec(sys.executable, 'bot.py', env=self.env())
+        print(f"🚀 Cluster {self.cluster_id} (shards {self.shard_ids[0]}-{self.shard_ids[-1]}) started as pid {self.process.pid}")
+
+    async def supervise(self, stopping):
+        while True:
+            code = await self.process.wait()
+            if stopping.is_set():
+                return
+            self.restarts += 1
+            delay = min(MAX_BACKOFF, 2 ** min(self.restarts, 6))
+            print(f"💥 Cluster {self.cluster_id} exited with {code}; restart #{self.restarts} in {delay}s")
+            await asyncio.sleep(delay)
+            if stopping.is_set():
+                return
+            await self.spawn()
+
+
+async def launch(args):
+    token = os.getenv('DISCORD_TOKEN')
+    if not token:
+        print("❌ ERROR: DISCORD_TOKEN not set in .env")
+        return 1
+    shard_count, max_concurrency = await recommended_shards(token)
+    if args.shards:
+        shard_count = args.shards
+    ranges = shard_ranges(shard_count, min(args.clusters, shard_count))
+    print(f"🧩 {shard_count} shards across {len(ranges)} clusters")
+
+    await run_migrations()
+    # Health docs of clusters a previous, larger run had; they would never report again
+    await db.clusters.delete_many({'_id': {'$gte': len(ranges)}})
+    # Ready once every cluster of this run reports all its shards up
+    health_server = HealthServer(lambda: cluster_readiness(len(ranges)))
+    await health_server.start()
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    clusters = [Cluster(i, ids, shard_count) for i, ids in enumerate(ranges)]
+    supervisors = []
+    for cluster in clusters:
+        if stopping.is_set():
+            break
+        await cluster.spawn()
+        supervisors.append(asyncio.create_task(cluster.supervise(stopping)))
+        # Stagger starts so clusters don't identify inside each other's rate-limit window
+        await asyncio.sleep(math.ceil(len(cluster.shard_ids) / max_concurrency) * IDENTIFY_WINDOW)
+
+    await stopping.wait()
+    print("🛑 Stopping clusters")
+    for cluster in clusters:
+        if cluster.process and cluster.process.returncode is None:
+            cluster.process.terminate()
+    await asyncio.gather(*supervisors, return_exceptions=True)
+    await asyncio.gather(*(c.process.wait() for c in clusters if c.process), return_exceptions=True)
+    await health_server.stop()
+    return 0
+
+
+async def status():
+    now = datetime.now(timezone.utc)
+    for doc in await cluster_health():
+        shards = doc['shards']
+        down = [s['id'] for s in shards if not s['up']]
+        latencies = [s['latency_ms'] for s in shards if s['latency_ms'] is not None]
+        state = '❌ stale' if doc['stale'] else ('⚠️ shards down: ' + ', '.join(map(str, down)) if down else '✅ healthy')
+        print(
+            f"Cluster {doc['_id']}: {state} | shards {shards[0]['id'] if shards else '-'}-{shards[-1]['id'] if shards else '-'}"
+            f" | {doc['guilds']} guilds | max latency {max(latencies, default=0)}ms"
+            f" | loop p99 {doc['loop_lag_p99_ms']}ms | RSS {doc['rss_mb']} MiB"
+            f" | pid {doc['pid']}@{doc['host']} | reported {int((now - doc['updated_at']).total_seconds())}s ago"
+        )
+    return 0
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Run StaffSuite as sharded clusters.')
+    parser.add_argument('--clusters', type=int, default=os.cpu_count() or 1, help='Worker processes (default: CPU count)')
+    parser.add_argument('--shards', type=int, default=None, help='Total shards (default: Discord recommendation)')
+    parser.add_argument('--status', action='store_true', help='Print every cluster\'s last health report and exit')
+    args = parser.parse_args(argv)
+    load_dotenv()
+    return asyncio.run(status() if args.status else launch(args))
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,23 @@
+from utils.auditcache import AuditCache
+
+
+def test_total_bytes_holds_as_guilds_fill_one_after_another():
+    cache = AuditCache(guild_bytes=64 * 1024, total_bytes=256 * 1024)
+    message_id = 0
+    for guild_id in range(1, 41):
+        # Each guild fills its full per-guild cap while it is the newest one
+        for _ in range(200):
+            message_id += 1
+            cache.put(guild_id, message_id, 1, 1, 'x' * 500)
+            assert cache.bytes <= cache.total_bytes
+    assert cache.bytes == sum(cache._sizes.values())
+    assert max(cache._sizes.values()) <= cache.budget() + 1000
+
+
+def test_quiet_guild_keeps_messages_under_its_share():
+    cache = AuditCache(guild_bytes=64 * 1024, total_bytes=256 * 1024)
+    cache.put(1, 1, 1, 1, 'quiet')
+    for message_id in range(2, 2000):
+        cache.put(2, message_id, 1, 1, 'x' * 500)
+    assert cache._guilds[1]
+    assert cache._sizes[2] <= cache.budget()
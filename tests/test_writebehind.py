@@ -0,0 +1,27 @@
+from utils.writebehind import WriteBehind
+
+
+def fill(wb, collection, count):
+    for i in range(count):
+        wb.insert(collection, {'n': i})
+
+
+def test_requeue_counts_only_dropped_documents():
+    wb = WriteBehind(max_backlog=10)
+    fill(wb, 'logs', 6)
+    fill(wb, 'feedback', 4)
+    wb._requeue('logs', [{'n': -i} for i in range(5)])
+    assert wb.dropped == 5
+    assert wb.backlog() == 10
+    # The requeued (oldest) documents went first
+    assert [d['n'] for d in wb._buffers['logs']] == list(range(6))
+
+
+def test_requeue_trims_other_buffers_down_to_max_backlog():
+    wb = WriteBehind(max_backlog=3)
+    fill(wb, 'logs', 8)
+    wb._requeue('feedback', [{'n': i} for i in range(4)])
+    assert wb.dropped == 9
+    assert wb.backlog() == 3
+    assert wb._buffers['feedback'] == []
+    assert [d['n'] for d in wb._buffers['logs']] == [5, 6, 7]
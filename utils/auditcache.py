@@ -0,0 +1,218 @@
+"""Message content for delete/edit audit logs, bounded per guild by bytes.
+
+discord.py's own message cache is one count-bounded deque shared by every
+guild, so busy guilds push quiet guilds' messages out. This cache keeps an
+insertion-ordered map per guild and evicts that guild's oldest messages once
+its entries exceed its byte budget: `guild_bytes`, shrunk to a fair share of
+`total_bytes` when many guilds are active. A guild is trimmed to the current
+share on its next message, and whenever the cache as a whole goes over
+`total_bytes` the guilds furthest over the share are trimmed too, so memory
+stays within `total_bytes` however many guilds there are.
+
+With `spill_path` set, evicted messages go to a SQLite file instead of being
+dropped; rows older than `spill_days` (by message snowflake) are pruned.
+SQLite is only touched from one worker thread, never from the event loop.
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import discord
+
+AUDIT_GUILD_BYTES = int(os.getenv('AUDIT_CACHE_GUILD_BYTES', 512 * 1024))
+AUDIT_TOTAL_BYTES = int(os.getenv('AUDIT_CACHE_TOTAL_BYTES', 256 * 1024 * 1024))
+AUDIT_SPILL_PATH = os.getenv('AUDIT_CACHE_SPILL')
+AUDIT_SPILL_DAYS = int(os.getenv('AUDIT_CACHE_SPILL_DAYS', 7))
+# Measured per-entry cost beyond the content string: the slots object, its three
+# snowflake ints and the OrderedDict slot and link
+ENTRY_OVERHEAD = 300
+
+
+class AuditEntry:
+    __slots__ = ('channel_id', 'author_id', 'content', 'size')
+
+    def __init__(self, channel_id, author_id, content):
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.content = content
+        self.size = ENTRY_OVERHEAD + sys.getsizeof(content)
+
+
+class AuditSpill:
+    """Evicted entries in SQLite. Writes are buffered and flushed in batches by `flush()`."""
+
+    def __init__(self, path, days=AUDIT_SPILL_DAYS):
+        self.path = path
+        self.days = days
+        self._pending = {}  # message_id -> (guild_id, channel_id, author_id, content), not yet written
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix='audit-spill')
+        self._db = None
+        self.rows_written = 0
+
+    def _open(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS messages (message_id INTEGER PRIMARY KEY, guild_id INTEGER, '
+                'channel_id INTEGER, author_id INTEGER, content TEXT)'
+            )
+        return self._db
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def add(self, guild_id, message_id, entry):
+        self._pending[message_id] = (guild_id, entry.channel_id, entry.author_id, entry.content)
+
+    def _write(self, rows, oldest_id):
+        db = self._open()
+        with db:
+            db.executemany('INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?)', rows)
+            db.execute('DELETE FROM messages WHERE message_id < ?', (oldest_id,))
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        rows = [(message_id, *row) for message_id, row in pending.items()]
+        oldest_id = discord.utils.time_snowflake(discord.utils.utcnow() - timedelta(days=self.days))
+        await self._call(self._write, rows, oldest_id)
+        self.rows_written += len(rows)
+
+    def _take(self, message_id):
+        db = self._open()
+        row = db.execute('SELECT channel_id, author_id, content FROM messages WHERE message_id = ?', (message_id,)).fetchone()
+        if row:
+            with db:
+                db.execute('DELETE FROM messages WHERE message_id = ?', (message_id,))
+        return row
+
+    async def take(self, message_id):
+        """Remove and return the spilled entry for `message_id`, or None."""
+        row = self._pending.pop(message_id, None)
+        if row:
+            return AuditEntry(*row[1:])
+        row = await self._call(self._take, message_id)
+        return AuditEntry(*row) if row else None
+
+    async def close(self):
+        await self.flush()
+        if self._db is not None:
+            await self._call(self._db.close)
+        self._executor.shutdown(wait=True)
+
+
+class AuditCache:
+    def __init__(self, guild_bytes=AUDIT_GUILD_BYTES, total_bytes=AUDIT_TOTAL_BYTES, spill_path=AUDIT_SPILL_PATH):
+        self.guild_bytes = guild_bytes
+        self.total_bytes = total_bytes
+        self.spill = AuditSpill(spill_path) if spill_path else None
+        self._guilds = {}  # guild_id -> OrderedDict[message_id, AuditEntry], oldest first
+        self._sizes = {}   # guild_id -> bytes held
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def budget(self):
+        """Current per-guild byte budget: the fixed cap or a fair share of the total, whichever is smaller."""
+        return min(self.guild_bytes, self.total_bytes // max(1, len(self._guilds)))
+
+    def put(self, guild_id, message_id, channel_id, author_id, content):
+        entries = self._guilds.get(guild_id)
+        if entries is None:
+            entries = self._guilds[guild_id] = OrderedDict()
+            self._sizes[guild_id] = 0
+        old = entries.pop(message_id, None)
+        if old:
+            self._resize(guild_id, -old.size)
+        entry = entries[message_id] = AuditEntry(channel_id, author_id, content)
+        self._resize(guild_id, entry.size)
+        budget = self.budget()
+        self._trim(guild_id, budget, keep=1)
+        if self.bytes > self.total_bytes:
+            # Guilds that filled up while fewer were active still hold their old, larger share
+            for other in sorted(self._guilds, key=self._sizes.get, reverse=True):
+                if self.bytes <= self.total_bytes or self._sizes[other] <= budget:
+                    break
+                self._trim(other, max(budget, self._sizes[other] - (self.bytes - self.total_bytes)))
+
+    def _trim(self, guild_id, budget, keep=0):
+        """Evict the guild's oldest entries (to the spill, if any) until it holds at most `budget` bytes."""
+        entries = self._guilds[guild_id]
+        while self._sizes[guild_id] > budget and len(entries) > keep:
+            evicted_id, evicted = entries.popitem(last=False)
+            self._resize(guild_id, -evicted.size)
+            self.evicted += 1
+            if self.spill:
+                self.spill.add(guild_id, evicted_id, evicted)
+
+    def _resize(self, guild_id, delta):
+        self._sizes[guild_id] += delta
+        self.bytes += delta
+
+    async def pop(self, guild_id, message_id):
+        """Remove and return the entry for a deleted message, or None if it was never seen or is gone."""
+        entries = self._guilds.get(guild_id)
+        entry = entries.pop(message_id, None) if entries else None
+        if entry:
+            self._resize(guild_id, -entry.size)
+        elif self.spill:
+            entry = await self.spill.take(message_id)
+        self._count(entry)
+        return entry
+
+    async def edit(self, guild_id, message_id, content):
+        """Record an edit; returns the previous content, or None if the message was not cached."""
+        entries = self._guilds.get(guild_id)
+        entry = entries.get(message_id) if entries else None
+        if entry is None:
+            spilled = await self.spill.take(message_id) if self.spill else None
+            self._count(spilled)
+            if spilled:
+                # Back in memory with its new content, as the guild's newest entry
+                self.put(guild_id, message_id, spilled.channel_id, spilled.author_id, content)
+                return spilled.content
+            return None
+        self._count(entry)
+        before = entry.content
+        if before != content:
+            self._resize(guild_id, -entry.size)
+            entry.content = content
+            entry.size = ENTRY_OVERHEAD + sys.getsizeof(content)
+            self._resize(guild_id, entry.size)
+        return before
+
+    def forget_guild(self, guild_id):
+        self._guilds.pop(guild_id, None)
+        self.bytes -= self._sizes.pop(guild_id, 0)
+
+    def _count(self, entry):
+        if entry:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        stats = {
+            'guilds': len(self._guilds),
+            'messages': sum(len(entries) for entries in self._guilds.values()),
+            'bytes': self.bytes,
+            'guild_budget': self.budget(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 3) if total else 0.0,
+            'evicted': self.evicted,
+        }
+        if self.spill:
+            stats['spilled_rows'] = self.spill.rows_written
+        return stats
+
+    async def close(self):
+        if self.spill:
+            await self.spill.close()
@@ -0,0 +1,192 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+
+import discord
+from utils.mongo import db
+from utils.members import role_member_ids
+from utils.cluster import owns
+from utils import metrics
+
+# Interaction tokens stop accepting edits after 15 minutes
+INTERACTION_TTL = 14 * 60
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` acquisitions per second, bursting to `burst`."""
+
+    def __init__(self, rate, burst=1, name='limiter'):
+        self.rate = rate
+        self.name = name
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        with metrics.THROTTLE_WAIT.labels(self.name).time():
+            await self._acquire()
+
+    async def _acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class BroadcastManager:
+    """Background DM fan-out jobs with persisted progress.
+
+    A job is stored in `db.broadcasts` with the recipients still `pending`.
+    A small pool of workers sends DMs through a shared rate limiter, and
+    progress is checkpointed every `checkpoint_interval` seconds by pulling
+    the finished recipients, so a restart resumes where the last checkpoint
+    left off instead of messaging everyone again. A job is only marked `done`
+    once nobody is pending; if a worker dies with anything but a per-recipient
+    HTTP error the job stops as `failed`, keeping the recipients it did not
+    reach. Progress is reported by editing the invoking interaction while its
+    token is valid; the final summary falls back to a DM to the invoker.
+    """
+
+    def __init__(self, bot, workers=None, rate=None, checkpoint_interval=2.0):
+        self.bot = bot
+        self.workers = workers or int(os.getenv('BROADCAST_WORKERS', 4))
+        self.limiter = RateLimiter(rate or float(os.getenv('BROADCAST_DM_RATE', 5)), burst=self.workers, name='broadcast_dm')
+        self.checkpoint_interval = checkpoint_interval
+        self._tasks = {}
+        self._resumer = None
+
+    async def start(self, guild, role, message, invoker, interaction=None):
+        recipients = await role_member_ids(guild, role)
+        job = {
+            'guild_id': guild.id,
+            'role_id': role.id,
+            'invoker_id': invoker.id,
+            'message': message,
+            'pending': recipients,
+            'total': len(recipients),
+            'sent': 0,
+            'failed': 0,
+            'status': 'running',
+            'created_at': datetime.now(timezone.utc),
+        }
+        job['_id'] = (await db.broadcasts.insert_one(job)).inserted_id
+        if interaction:
+            await interaction.edit_original_response(content=f"📣 Broadcast queued for {len(recipients)} staff.")
+        self._launch(job, interaction)
+        return job
+
+    def resume(self):
+        """Relaunch this cluster's unfinished jobs in the background once the client is ready."""
+        if self._resumer is None or self._resumer.done():
+            self._resumer = asyncio.create_task(self._resume())
+
+    async def _resume(self):
+        # Called from cog_load, before login: fetching users needs the HTTP session
+        await self.bot.wait_until_ready()
+        async for job in db.broadcasts.find({'status': 'running'}):
+            # Jobs resume on the cluster whose shard holds their guild
+            if job['_id'] not in self._tasks and owns(self.bot, job['guild_id']):
+                print(f"[Broadcast] Resuming job {job['_id']} ({len(job['pending'])} pending)")
+                self._launch(job, None)
+
+    async def stop(self):
+        tasks, self._tasks = list(self._tasks.values()), {}
+        if self._resumer:
+            tasks.append(self._resumer)
+            self._resumer = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _launch(self, job, interaction):
+        task = asyncio.create_task(self._run(job, interaction))
+        self._tasks[job['_id']] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job['_id'], None))
+
+    async def _run(self, job, interaction):
+        queue = asyncio.Queue()
+        for user_id in job['pending']:
+            queue.put_nowait(user_id)
+        done, counts = [], {'sent': 0, 'failed': 0}
+        totals = {'sent': job['sent'], 'failed': job['failed'], 'pending': len(job['pending'])}
+        started = time.monotonic()
+
+        async def checkpoint():
+            if not done:
+                return
+            batch, delta = done[:], dict(counts)
+            del done[:len(batch)]
+            counts['sent'] -= delta['sent']
+            counts['failed'] -= delta['failed']
+            await db.broadcasts.update_one({'_id': job['_id']}, {'$pullAll': {'pending': batch}, '$inc': delta})
+            totals['pending'] -= len(batch)
+            totals['sent'] += delta['sent']
+            totals['failed'] += delta['failed']
+
+        async def worker():
+            while not queue.empty():
+                user_id = queue.get_nowait()
+                await self.limiter.acquire()
+                try:
+                    user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+                    await user.send(job['message'])
+                    counts['sent'] += 1
+                except discord.HTTPException:
+                    counts['failed'] += 1
+                done.append(user_id)
+
+        def summary(final=False, error=None):
+            processed = totals['sent'] + totals['failed']
+            rate = processed / max(time.monotonic() - started, 1e-6)
+            head = "📣 Broadcast complete" if final else "📣 Broadcasting"
+            if error:
+                head = f"⚠️ Broadcast stopped ({error}) with {totals['pending']} staff not messaged"
+            return (f"{head}: {processed}/{job['total']} processed, {totals['sent']} delivered, "
+                    f"{totals['failed']} failed ({rate:.1f} DMs/s)")
+
+        async def report(final=False, error=None):
+            if interaction and time.monotonic() - started < INTERACTION_TTL:
+                try:
+                    await interaction.edit_original_response(content=summary(final, error))
+                    return True
+                except discord.HTTPException:
+                    pass
+            return False
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.workers)]
+        errors = []
+        try:
+            while not all(w.done() for w in workers):
+                await asyncio.wait(workers, timeout=self.checkpoint_interval, return_when=asyncio.FIRST_EXCEPTION)
+                await checkpoint()
+                errors = [w.exception() for w in workers if w.done() and w.exception()]
+                if errors:
+                    break
+                await report()
+        finally:
+            for w in workers:
+                w.cancel()
+            await checkpoint()
+
+        error = f"{type(errors[0]).__name__}: {errors[0]}" if errors else None
+        if error is None and totals['pending']:
+            error = 'recipients left unprocessed'
+        if error:
+            print(f"[Broadcast] Job {job['_id']} failed with {totals['pending']} pending: {error}")
+        await db.broadcasts.update_one({'_id': job['_id']}, {'$set': {
+            'status': 'failed' if error else 'done', 'finished_at': datetime.now(timezone.utc),
+            **({'error': error} if error else {}),
+        }})
+        if not await report(final=True, error=error):
+            try:
+                invoker = self.bot.get_user(job['invoker_id']) or await self.bot.fetch_user(job['invoker_id'])
+                await invoker.send(summary(final=True, error=error))
+            except discord.HTTPException:
+                pass
@@ -0,0 +1,68 @@
+import asyncio
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+CHART_WORKERS = int(os.getenv('CHART_WORKERS', 2))
+CACHE_SIZE = int(os.getenv('CHART_CACHE_SIZE', 128))
+
+_executor = None
+_cache = OrderedDict()  # digest -> PNG bytes
+stats = {'hits': 0, 'misses': 0}
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # spawn, not fork: the bot process has live sockets and pymongo threads
+        _executor = ProcessPoolExecutor(CHART_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    return _executor
+
+
+def _render_bar_chart(names, counts, ylabel):
+    """Render in a worker process with the object-oriented API (no pyplot global state)."""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(8, 4))
+    ax = fig.subplots()
+    ax.bar(names, counts)
+    ax.set_ylabel(ylabel)
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment('right')
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png')
+    return buf.getvalue()
+
+
+async def bar_chart(scope, names, counts, ylabel=''):
+    """PNG bytes of a bar chart, rendered off the event loop and cached by content.
+
+    `scope` (e.g. the guild id) is part of the cache key so identical data in
+    two guilds never shares an entry.
+    """
+    digest = hashlib.sha256(json.dumps([scope, names, counts, ylabel]).encode()).hexdigest()
+    png = _cache.get(digest)
+    if png is not None:
+        _cache.move_to_end(digest)
+        stats['hits'] += 1
+        return png
+    stats['misses'] += 1
+    loop = asyncio.get_running_loop()
+    png = await loop.run_in_executor(_get_executor(), _render_bar_chart, names, counts, ylabel)
+    _cache[digest] = png
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return png
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
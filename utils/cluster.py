@@ -0,0 +1,98 @@
+"""Shard ownership and health reporting for one cluster (bot process).
+
+`launcher.py` starts each cluster with SHARD_COUNT, SHARD_IDS and CLUSTER_ID
+set; a plain `python bot.py` leaves them unset and runs every shard itself.
+"""
+import asyncio
+import math
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from utils.mongo import db
+from utils.procstats import rss_mb
+from utils.deadlines import as_utc
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(',') if v.strip()] if value else None
+
+
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', 0)) or None
+SHARD_IDS = _int_list(os.getenv('SHARD_IDS'))
+CLUSTER_ID = int(os.environ['CLUSTER_ID']) if os.getenv('CLUSTER_ID') else None
+HEALTH_INTERVAL = 30
+
+
+def shard_for(guild_id, shard_count):
+    """The shard Discord routes a guild to."""
+    return (guild_id >> 22) % shard_count
+
+
+def owns(bot, guild_id):
+    """True if `guild_id` is on one of this process's shards."""
+    if guild_id is None or not bot.shard_count or bot.shard_ids is None:
+        return True
+    return shard_for(guild_id, bot.shard_count) in bot.shard_ids
+
+
+class ClusterHealth:
+    """Upsert this cluster's shard latencies and load into `db.clusters` every HEALTH_INTERVAL."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.started_at = datetime.now(timezone.utc)
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop reporting and remove this cluster's doc, so it is not left behind as a dead cluster."""
+        if self._task:
+            self._task.cancel()
+            # Let a report in flight finish cancelling so it cannot land after the delete
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await db.clusters.delete_one({'_id': CLUSTER_ID or 0})
+        except Exception as e:
+            print(f"[Cluster] Removing health report failed: {e}")
+
+    def snapshot(self):
+        shards = [
+            {'id': shard_id, 'latency_ms': round(info.latency * 1000) if math.isfinite(info.latency) else None,
+             'up': not info.is_closed()}
+            for shard_id, info in sorted(self.bot.shards.items())
+        ]
+        monitor = getattr(self.bot, 'loop_monitor', None)
+        return {
+            'host': socket.gethostname(),
+            'pid': os.getpid(),
+            'started_at': self.started_at,
+            'updated_at': datetime.now(timezone.utc),
+            'shard_count': self.bot.shard_count,
+            'shards': shards,
+            'guilds': len(self.bot.guilds),
+            'ready': self.bot.is_ready(),
+            'loop_lag_p99_ms': monitor.summary()['p99_ms'] if monitor else None,
+            'rss_mb': round(rss_mb()),
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                await db.clusters.replace_one({'_id': CLUSTER_ID or 0}, self.snapshot(), upsert=True)
+            except Exception as e:
+                print(f"[Cluster] Health report failed: {e}")
+            await asyncio.sleep(HEALTH_INTERVAL)
+
+
+async def cluster_health():
+    """Every cluster's last health report, flagged `stale` when it stopped reporting."""
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=3 * HEALTH_INTERVAL)
+    docs = await db.clusters.find().sort('_id', 1).to_list(None)
+    for doc in docs:
+        doc['updated_at'], doc['started_at'] = as_utc(doc['updated_at']), as_utc(doc['started_at'])
+        doc['stale'] = doc['updated_at'] < stale_before
+    return docs
@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+
+class CoalescingRefresher:
+    """Run `refresh(key)` once per burst of `mark(key)` calls, from one worker.
+
+    A key is refreshed `debounce` seconds after its last mark (trailing edge),
+    but never later than `max_wait` after its first one, so a constant stream
+    of changes still refreshes regularly. At most `concurrency` refreshes run
+    at once across all keys, and a key is never refreshed concurrently with
+    itself: marks that arrive mid-refresh leave it dirty, which guarantees one
+    more refresh after the last change.
+    """
+
+    def __init__(self, refresh, debounce=3.0, max_wait=10.0, concurrency=4, name='refresher'):
+        self.refresh = refresh
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.name = name
+        self._first_mark = {}  # key -> monotonic time of the first mark since the last refresh began
+        self._last_mark = {}   # key -> monotonic time of the latest mark
+        self._running = set()
+        self._refreshes = set()  # in-flight refresh tasks, referenced until they finish
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._wake = asyncio.Event()
+        self._task = None
+        self.refreshes = 0
+        self.marks = 0
+
+    def mark(self, key):
+        now = time.monotonic()
+        self._first_mark.setdefault(key, now)
+        self._last_mark[key] = now
+        self.marks += 1
+        self._wake.set()
+
+    def pending(self):
+        return len(self._last_mark)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        tasks = list(self._refreshes)
+        if self._task:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _due(self, key):
+        return min(self._last_mark[key] + self.debounce, self._first_mark[key] + self.max_wait)
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            now = time.monotonic()
+            next_due = None
+            for key in list(self._last_mark):
+                if key in self._running:
+                    continue
+                due = self._due(key)
+                if due <= now:
+                    del self._first_mark[key], self._last_mark[key]
+                    self._running.add(key)
+                    task = asyncio.create_task(self._refresh(key))
+                    self._refreshes.add(task)
+                    task.add_done_callback(self._refreshes.discard)
+                elif next_due is None or due < next_due:
+                    next_due = due
+            try:
+                await asyncio.wait_for(self._wake.wait(), None if next_due is None else next_due - now)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refresh(self, key):
+        try:
+            async with self._semaphore:
+                await self.refresh(key)
+                self.refreshes += 1
+        except Exception as e:
+            print(f"[{self.name}] Refresh of {key!r} failed: {e}")
+        finally:
+            self._running.discard(key)
+            self._wake.set()
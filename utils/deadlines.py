@@ -0,0 +1,101 @@
+import asyncio
+import heapq
+import itertools
+from datetime import datetime, timezone
+
+# Upper bound on a single sleep so wall-clock jumps are noticed eventually
+MAX_SLEEP = 300
+
+
+def as_utc(dt):
+    """Mongo returns naive UTC datetimes; make them comparable with aware ones."""
+    if dt is None:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def next_cron_run(cron, after):
+    """Next time `cron` fires strictly after `after` (aware UTC)."""
+    from croniter import croniter  # slow to import; only needed once schedules exist
+
+    return as_utc(croniter(cron, as_utc(after)).get_next(datetime))
+
+
+class DeadlineScheduler:
+    """Fire `callback(key, payload)` when each scheduled deadline passes.
+
+    Deadlines live in a min-heap and a single task sleeps until the earliest
+    one, so an idle scheduler costs nothing no matter how many timers are
+    pending. Re-scheduling a key replaces its previous deadline; replaced and
+    cancelled heap entries are skipped lazily when they reach the top.
+    """
+
+    def __init__(self, callback, name='scheduler'):
+        self.callback = callback
+        self.name = name
+        self._heap = []      # (due, seq, key)
+        self._entries = {}   # key -> (due, seq, payload)
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._task = None
+        self.fired = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def schedule(self, key, due, payload=None):
+        due = as_utc(due)
+        seq = next(self._seq)
+        self._entries[key] = (due, seq, payload)
+        heapq.heappush(self._heap, (due, seq, key))
+        if self._heap[0][1] == seq:
+            self._wake.set()
+
+    def cancel(self, key):
+        self._entries.pop(key, None)
+
+    def next_due(self):
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def _drop_stale(self):
+        while self._heap:
+            due, seq, key = self._heap[0]
+            entry = self._entries.get(key)
+            if entry and entry[1] == seq:
+                return
+            heapq.heappop(self._heap)
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            due = self.next_due()
+            if due is None:
+                await self._wake.wait()
+                continue
+            delay = (due - datetime.now(timezone.utc)).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=min(delay, MAX_SLEEP))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            _, _, key = heapq.heappop(self._heap)
+            _, _, payload = self._entries.pop(key)
+            self.fired += 1
+            try:
+                await self.callback(key, payload)
+            except Exception as e:
+                print(f"[{self.name}] Deadline handler for {key!r} failed: {e}")
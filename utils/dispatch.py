@@ -0,0 +1,111 @@
+import asyncio
+import time
+from collections import deque
+
+import discord
+
+MESSAGE_LIMIT = 2000
+
+
+class ChannelDispatcher:
+    """Coalesce text lines into as few messages as possible, per channel.
+
+    `enqueue` never blocks the caller: lines are buffered per channel and a
+    worker task waits `window` seconds after the first line, then packs
+    everything pending into messages of up to 2000 characters. Each channel's
+    buffer is bounded by `max_buffer`; when it is full, new lines are counted
+    as dropped and reported in a summary line on the next flush, so a raid
+    costs a handful of sends instead of one per event.
+    """
+
+    def __init__(self, window=2.0, max_buffer=500):
+        self.window = window
+        self.max_buffer = max_buffer
+        self._queues = {}   # channel_id -> deque[(enqueued_at, line)]
+        self._dropped = {}  # channel_id -> lines dropped since the last flush
+        self._workers = {}  # channel_id -> asyncio.Task
+        self._channels = {}  # channel_id -> channel
+        self.events = 0
+        self.dropped = 0
+        self.messages_sent = 0
+        self.send_errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def enqueue(self, channel, line):
+        queue = self._queues.setdefault(channel.id, deque())
+        if len(queue) >= self.max_buffer:
+            self._dropped[channel.id] = self._dropped.get(channel.id, 0) + 1
+            self.dropped += 1
+            return False
+        if len(line) > MESSAGE_LIMIT:
+            line = line[:MESSAGE_LIMIT - 1] + '…'
+        queue.append((time.monotonic(), line))
+        self.events += 1
+        self._channels[channel.id] = channel
+        worker = self._workers.get(channel.id)
+        if worker is None or worker.done():
+            self._workers[channel.id] = asyncio.create_task(self._run(channel))
+        return True
+
+    async def _run(self, channel):
+        queue = self._queues[channel.id]
+        while queue or self._dropped.get(channel.id):
+            await asyncio.sleep(self.window)
+            await self._flush(channel)
+
+    async def _flush(self, channel):
+        queue = self._queues[channel.id]
+        batch = [queue.popleft() for _ in range(len(queue))]
+        dropped = self._dropped.pop(channel.id, 0)
+        lines = [line for _, line in batch]
+        if dropped:
+            lines.append(f"⚠️ {dropped} more events were not logged (mod-log backlog full).")
+        for chunk in _pack(lines):
+            try:
+                await channel.send(chunk, allowed_mentions=discord.AllowedMentions.none())
+                self.messages_sent += 1
+            except discord.HTTPException as e:
+                self.send_errors += 1
+                print(f"[Logging] Failed to send mod-log to {channel.id}: {e}")
+        if batch:
+            self.last_lag = time.monotonic() - batch[0][0]
+            self.max_lag = max(self.max_lag, self.last_lag)
+
+    async def close(self):
+        """Cancel the workers and deliver whatever is still buffered."""
+        workers, self._workers = self._workers, {}
+        for task in workers.values():
+            task.cancel()
+        await asyncio.gather(*workers.values(), return_exceptions=True)
+        for channel_id, queue in self._queues.items():
+            if queue or self._dropped.get(channel_id):
+                await self._flush(self._channels[channel_id])
+
+    def depth(self):
+        return sum(len(q) for q in self._queues.values())
+
+    def stats(self):
+        return {
+            'queue_depth': self.depth(),
+            'channels': len(self._queues),
+            'events': self.events,
+            'messages_sent': self.messages_sent,
+            'dropped': self.dropped,
+            'send_errors': self.send_errors,
+            'last_lag_s': round(self.last_lag, 2),
+            'max_lag_s': round(self.max_lag, 2),
+        }
+
+
+def _pack(lines, limit=MESSAGE_LIMIT):
+    """Join lines into newline-separated chunks no longer than `limit`."""
+    chunk = ''
+    for line in lines:
+        if chunk and len(chunk) + 1 + len(line) > limit:
+            yield chunk
+            chunk = line
+        else:
+            chunk = f"{chunk}\n{line}" if chunk else line
+    if chunk:
+        yield chunk
@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+from discord import app_commands
+from utils.mongo import db
+from utils.deadlines import as_utc
+
+LIFETIME = datetime.max.replace(tzinfo=timezone.utc)
+
+
+class ProRequired(app_commands.CheckFailure):
+    """Raised by `pro_required()` when the guild has no active Pro key."""
+
+
+class Entitlements:
+    """Effective Pro state of every guild, held in memory.
+
+    A guild is Pro until the latest expiry among its activated keys, so each
+    entry carries its own TTL: `is_pro` compares against it and needs no I/O.
+    Entries only change when a key is activated, deactivated or expires, and
+    those paths call `refresh(guild_id)`.
+    """
+
+    def __init__(self):
+        self._active_until = {}  # guild_id -> aware datetime (LIFETIME for keys that never expire)
+        self.loaded = False
+
+    async def load(self):
+        now = datetime.now(timezone.utc)
+        active = {}
+        query = {'used': True, '$or': [{'expires_at': None}, {'expires_at': {'$gt': now}}]}
+        async for rec in db.keys.find(query, {'guild_id': 1, 'expires_at': 1}):
+            until = as_utc(rec['expires_at']) or LIFETIME
+            active[rec['guild_id']] = max(until, active.get(rec['guild_id'], until))
+        self._active_until = active
+        self.loaded = True
+
+    async def refresh(self, guild_id):
+        until = None
+        async for rec in db.keys.find({'guild_id': guild_id, 'used': True}, {'expires_at': 1}):
+            candidate = as_utc(rec['expires_at']) or LIFETIME
+            until = candidate if until is None else max(until, candidate)
+        if until is None:
+            self._active_until.pop(guild_id, None)
+        else:
+            self._active_until[guild_id] = until
+
+    def active_until(self, guild_id):
+        return self._active_until.get(guild_id)
+
+    def is_pro(self, guild_id):
+        until = self._active_until.get(guild_id)
+        return until is not None and until > datetime.now(timezone.utc)
+
+
+entitlements = Entitlements()
+
+
+def pro_required():
+    """App command check that only lets Pro guilds through; raises ProRequired otherwise."""
+    def predicate(interaction):
+        if interaction.guild_id is None or not entitlements.is_pro(interaction.guild_id):
+            raise ProRequired('🚫 Pro not active.')
+        return True
+    return app_commands.check(predicate)
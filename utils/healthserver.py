@@ -0,0 +1,104 @@
+"""Liveness, readiness and metrics over HTTP, served from the bot's own event loop.
+
+/livez answers as long as the loop can run a handler, so a wedged loop fails
+the probe by timing out. /readyz runs the readiness checks and answers 503
+with the failing ones. /metrics is the Prometheus exposition.
+"""
+import asyncio
+import os
+import time
+from aiohttp import web
+from utils import metrics
+from utils.mongo import client
+from utils.cluster import cluster_health
+
+HEALTH_PORT = int(os.getenv('HEALTH_PORT', os.getenv('PORT', 8080)))
+# Readiness thresholds
+MAX_DB_PING_MS = float(os.getenv('READY_MAX_DB_PING_MS', 500))
+MAX_LOOP_LAG_MS = float(os.getenv('READY_MAX_LOOP_LAG_MS', 250))
+LAG_WINDOW = 5  # seconds of loop-lag samples readiness looks at
+DB_PING_TIMEOUT = 2
+
+
+async def db_ping_ms():
+    start = time.perf_counter()
+    await asyncio.wait_for(client.admin.command('ping'), DB_PING_TIMEOUT)
+    return (time.perf_counter() - start) * 1000
+
+
+def bot_readiness(bot):
+    """Readiness checks for a bot process: gateway, shards, Mongo and loop lag."""
+    async def check():
+        checks = {}
+        checks['gateway'] = {'ok': bot.is_ready() and not bot.is_closed()}
+        down = [shard_id for shard_id, info in bot.shards.items() if info.is_closed()]
+        checks['shards'] = {'ok': bool(bot.shards) and not down, 'down': down, 'total': len(bot.shards)}
+        try:
+            ping = await db_ping_ms()
+            checks['mongo'] = {'ok': ping <= MAX_DB_PING_MS, 'ping_ms': round(ping, 1)}
+        except Exception as e:
+            checks['mongo'] = {'ok': False, 'error': str(e) or type(e).__name__}
+        lag = bot.loop_monitor.recent_max(LAG_WINDOW) * 1000
+        checks['loop_lag'] = {'ok': lag <= MAX_LOOP_LAG_MS, 'max_ms': round(lag, 1)}
+        return checks
+    return check
+
+
+async def cluster_readiness(expected=None):
+    """Readiness for launcher.py: clusters 0..expected-1 (default: every one that reported) up with all shards."""
+    docs = {doc['_id']: doc for doc in await cluster_health()}
+    checks = {}
+    for cluster_id in range(expected) if expected is not None else docs:
+        doc = docs.get(cluster_id)
+        if doc is None:
+            checks[f"cluster_{cluster_id}"] = {'ok': False, 'error': 'not reported yet'}
+            continue
+        down = [s['id'] for s in doc['shards'] if not s['up']]
+        checks[f"cluster_{cluster_id}"] = {'ok': not doc['stale'] and doc['ready'] and not down, 'down': down}
+    return checks or {'clusters': {'ok': False, 'error': 'no cluster has reported yet'}}
+
+
+class HealthServer:
+    """aiohttp server for /livez, /readyz and /metrics.
+
+    `readiness` is an async callable returning {name: {'ok': bool, ...}}.
+    `alive` is an optional sync callable; /livez fails when it returns False.
+    """
+
+    def __init__(self, readiness, port=HEALTH_PORT, alive=None):
+        self.readiness = readiness
+        self.port = port
+        self.alive = alive
+        self._runner = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/livez', self.livez)
+        app.router.add_get('/readyz', self.readyz)
+        app.router.add_get('/metrics', self.metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, '0.0.0.0', self.port).start()
+        print(f"🩺 Health server on :{self.port}")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def livez(self, request):
+        if self.alive and not self.alive():
+            return web.json_response({'status': 'dead'}, status=503)
+        return web.json_response({'status': 'ok'})
+
+    async def readyz(self, request):
+        try:
+            checks = await self.readiness()
+        except Exception as e:
+            checks = {'readiness': {'ok': False, 'error': str(e) or type(e).__name__}}
+        ready = all(c['ok'] for c in checks.values())
+        return web.json_response({'status': 'ready' if ready else 'unready', 'checks': checks}, status=200 if ready else 503)
+
+    async def metrics(self, request):
+        body, content_type = metrics.render()
+        return web.Response(body=body, headers={'Content-Type': content_type})
@@ -0,0 +1,121 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from utils import metrics
+
+
+class LoopLagMonitor:
+    """Sample how late the event loop wakes a sleeping task.
+
+    Any synchronous work on the loop (a blocking DB call, CPU-heavy rendering)
+    delays every other coroutine; that delay shows up here as lag. Comparing
+    `blocked_seconds` before and after a change measures how much blocking
+    time it removed.
+    """
+
+    def __init__(self, interval=0.25, threshold=0.05, window=2400):
+        self.interval = interval
+        self.threshold = threshold
+        self.samples = deque(maxlen=window)
+        self.blocked_seconds = 0.0
+        self.max_lag = 0.0
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - start - self.interval))
+
+    def record(self, lag):
+        self.samples.append(lag)
+        metrics.LOOP_LAG.observe(lag)
+        self.max_lag = max(self.max_lag, lag)
+        if lag >= self.threshold:
+            self.blocked_seconds += lag
+
+    @property
+    def current(self):
+        return self.samples[-1] if self.samples else 0.0
+
+    def recent_max(self, seconds):
+        """Worst lag over roughly the last `seconds`."""
+        count = max(1, int(seconds / self.interval))
+        return max(list(self.samples)[-count:], default=0.0)
+
+    def percentile(self, pct):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def summary(self):
+        return {
+            'p50_ms': round(self.percentile(50) * 1000, 1),
+            'p99_ms': round(self.percentile(99) * 1000, 1),
+            'max_ms': round(self.max_lag * 1000, 1),
+            'blocked_s': round(self.blocked_seconds, 2),
+        }
+
+
+class StallWatchdog:
+    """Capture what the event loop is running while it is blocked.
+
+    A daemon thread pings the loop with `call_soon_threadsafe` every
+    `interval` seconds. When a ping is not answered within `threshold`, the
+    loop thread's current stack is captured, and the stall is recorded with
+    its full duration once the loop answers again.
+    """
+
+    def __init__(self, threshold=0.5, interval=0.1, keep=20):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = deque(maxlen=keep)  # (started_at, seconds, stack)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='stall-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            answered = threading.Event()
+            sent = time.monotonic()
+            try:
+                self._loop.call_soon_threadsafe(answered.set)
+            except RuntimeError:
+                return  # loop closed
+            if answered.wait(self.threshold):
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = ''.join(traceback.format_stack(frame)) if frame else ''
+            while not answered.wait(1):
+                if self._stop.is_set() or self._loop.is_closed():
+                    return
+            seconds = time.monotonic() - sent
+            self.stalls.append((datetime.now(timezone.utc), seconds, stack))
+            where = stack.rstrip().splitlines()[-2:] if stack else ['<unknown>']
+            print(f"[Watchdog] Event loop blocked for {seconds:.2f}s in:\n" + "\n".join(where))
@@ -0,0 +1,20 @@
+# Member lookups that work whether or not the guild was chunked at startup.
+# In lean gateway mode only members seen in events are cached, so callers ask
+# for the members they need instead of relying on a full member cache.
+
+
+async def ensure_members(guild, user_ids):
+    """Make sure the given members are in the guild's cache (by gateway query, 100 at a time)."""
+    if guild is None or guild.chunked:
+        return
+    missing = [uid for uid in set(user_ids) if guild.get_member(uid) is None]
+    for i in range(0, len(missing), 100):
+        await guild.query_members(user_ids=missing[i:i + 100], cache=True)
+
+
+async def role_member_ids(guild, role):
+    """IDs of the non-bot members holding `role`, without caching the whole guild."""
+    if guild.chunked:
+        return [m.id for m in role.members if not m.bot]
+    # Stream the member list over REST and keep only the ids we need
+    return [m.id async for m in guild.fetch_members(limit=None) if role in m.roles and not m.bot]
@@ -0,0 +1,106 @@
+"""Prometheus metrics for the bot process, served as text on /metrics.
+
+Commands are timed from the interaction's creation (its snowflake) to the
+handler returning, so gateway delivery and loop lag are included. Mongo
+operations are timed by a pymongo command listener, REST calls and their
+rate-limit waits by an aiohttp trace on discord.py's HTTP session.
+"""
+import asyncio
+import math
+import time
+import aiohttp
+import discord
+from pymongo import monitoring
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+LATENCY_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+SAMPLE_INTERVAL = 15
+
+COMMAND_SECONDS = Histogram(
+    'staffsuite_command_seconds', 'App command latency from interaction creation to completion',
+    ['command', 'status'], buckets=LATENCY_BUCKETS)
+MONGO_SECONDS = Histogram(
+    'staffsuite_mongo_seconds', 'Mongo operation latency', ['collection', 'command'], buckets=LATENCY_BUCKETS)
+MONGO_FAILURES = Counter('staffsuite_mongo_failures_total', 'Failed Mongo operations', ['collection', 'command'])
+GATEWAY_LATENCY = Gauge('staffsuite_gateway_latency_seconds', 'Gateway heartbeat latency', ['shard'])
+LOOP_LAG = Histogram(
+    'staffsuite_loop_lag_seconds', 'How late the event loop woke the lag sampler',
+    buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1, 5))
+TASK_TICK_SECONDS = Histogram(
+    'staffsuite_task_tick_seconds', 'Duration of one background task iteration', ['task'], buckets=LATENCY_BUCKETS)
+REST_SECONDS = Histogram(
+    'staffsuite_rest_seconds', 'Discord REST request latency', ['method', 'status'], buckets=LATENCY_BUCKETS)
+REST_RATELIMIT_WAIT = Histogram(
+    'staffsuite_rest_ratelimit_wait_seconds',
+    'Waits imposed by Discord rate limits: Retry-After on a 429, or the reset time of an exhausted bucket',
+    ['kind'], buckets=(.1, .25, .5, 1, 2.5, 5, 10, 30, 60))
+THROTTLE_WAIT = Histogram(
+    'staffsuite_throttle_wait_seconds', 'Time spent waiting on our own outbound rate limiters', ['limiter'],
+    buckets=(.01, .05, .1, .25, .5, 1, 2.5, 5))
+STARTUP_SECONDS = Gauge(
+    'staffsuite_startup_phase_seconds', 'Duration of each startup phase, or time from process start to a milestone',
+    ['phase'])
+
+
+def render():
+    """(body, content type) for a /metrics response."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class MongoListener(monitoring.CommandListener):
+    """Observe every Mongo command's latency, labelled by collection."""
+
+    def __init__(self):
+        self._started = {}  # (connection, request_id) -> (collection, command)
+
+    def started(self, event):
+        # getMore names the cursor id; its collection is a separate field
+        target = event.command.get('collection' if event.command_name == 'getMore' else event.command_name)
+        collection = target if isinstance(target, str) else '-'
+        self._started[(event.connection_id, event.request_id)] = (collection, event.command_name)
+
+    def succeeded(self, event):
+        labels = self._started.pop((event.connection_id, event.request_id), None)
+        if labels:
+            MONGO_SECONDS.labels(*labels).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        labels = self._started.pop((event.connection_id, event.request_id), None)
+        if labels:
+            MONGO_SECONDS.labels(*labels).observe(event.duration_micros / 1e6)
+            MONGO_FAILURES.labels(*labels).inc()
+
+
+def rest_trace():
+    """aiohttp TraceConfig for `discord.Client(http_trace=...)`."""
+    async def on_request_start(session, ctx, params):
+        ctx.started = time.perf_counter()
+
+    async def on_request_end(session, ctx, params):
+        response = params.response
+        REST_SECONDS.labels(params.method, str(response.status)).observe(time.perf_counter() - ctx.started)
+        headers = response.headers
+        if response.status == 429:
+            REST_RATELIMIT_WAIT.labels('429').observe(float(headers.get('Retry-After', 0)))
+        elif headers.get('X-RateLimit-Remaining') == '0':
+            REST_RATELIMIT_WAIT.labels('bucket').observe(float(headers.get('X-RateLimit-Reset-After', 0)))
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    return trace
+
+
+def observe_command(interaction, status):
+    command = interaction.command.qualified_name if interaction.command else 'unknown'
+    elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+    COMMAND_SECONDS.labels(command, status).observe(max(elapsed, 0))
+
+
+async def sample_gateway(bot):
+    """Copy each shard's heartbeat latency into its gauge every SAMPLE_INTERVAL."""
+    while True:
+        for shard_id, latency in bot.latencies:
+            if math.isfinite(latency):
+                GATEWAY_LATENCY.labels(str(shard_id)).set(latency)
+        await asyncio.sleep(SAMPLE_INTERVAL)
@@ -0,0 +1,198 @@
+"""Index bootstrap and versioned data migrations.
+
+`run_migrations()` is awaited from bot.py before any cog loads. It first makes
+sure every index in INDEXES exists (create_indexes is a no-op for indexes that
+are already built, so this is safe on every start), then applies any data
+migration newer than the version recorded in `meta.schema_version`.
+
+Run `python -m utils.migrations --check` to verify with explain() that none of
+the KNOWN_QUERIES falls back to a collection scan.
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING as ASC, DESCENDING as DESC, IndexModel
+from utils.mongo import db
+from utils import sessions, rollups
+from utils.deadlines import next_cron_run
+
+# Access patterns of each cog, declared as the indexes that serve them.
+INDEXES = {
+    # attendance / reporting / general
+    'logs': [
+        IndexModel([('guild_id', ASC), ('type', ASC), ('timestamp', ASC)], name='guild_type_ts'),
+        IndexModel([('user_id', ASC), ('guild_id', ASC), ('type', ASC), ('timestamp', ASC)], name='user_guild_type_ts'),
+        IndexModel([('guild_id', ASC), ('user_id', ASC), ('timestamp', ASC)], name='guild_user_ts'),
+    ],
+    'attendance_daily': [
+        IndexModel([('guild_id', ASC), ('user_id', ASC), ('day', ASC)], name='guild_user_day', unique=True),
+        IndexModel([('guild_id', ASC), ('day', ASC)], name='guild_day'),
+    ],
+    'sessions': [
+        IndexModel([('guild_id', ASC), ('user_id', ASC)], name='guild_user', unique=True),
+        IndexModel([('guild_id', ASC), ('started_at', ASC)], name='guild_started'),
+    ],
+    'voice_logs': [
+        IndexModel([('user_id', ASC), ('guild_id', ASC)], name='user_guild'),
+    ],
+    'voice_open': [
+        IndexModel([('guild_id', ASC), ('user_id', ASC)], name='guild_user', unique=True),
+    ],
+    # setup / settings cache
+    'settings': [
+        IndexModel([('guild_id', ASC)], name='guild', unique=True),
+        IndexModel([('rev', ASC)], name='rev'),
+    ],
+    # priority
+    'keys': [
+        IndexModel([('key', ASC)], name='key', unique=True),
+        IndexModel([('guild_id', ASC), ('used', ASC)], name='guild_used'),
+        IndexModel([('used', ASC), ('expired_notified', ASC), ('expires_at', ASC)], name='pending_expiry'),
+    ],
+    'schedules': [
+        IndexModel([('guild_id', ASC)], name='guild'),
+        IndexModel([('next_run', ASC)], name='next_run'),
+    ],
+    'broadcasts': [
+        IndexModel([('status', ASC)], name='status'),
+    ],
+    # salary
+    'salary': [
+        IndexModel([('guild_id', ASC), ('user_id', ASC)], name='guild_user', unique=True),
+    ],
+    # moderation
+    'infractions': [
+        IndexModel([('guild_id', ASC), ('user_id', ASC), ('timestamp', DESC)], name='guild_user_ts'),
+    ],
+    # general
+    'feedback': [
+        IndexModel([('guild_id', ASC), ('timestamp', DESC)], name='guild_ts'),
+    ],
+}
+
+# (collection, filter, sort) for every hot query the cogs issue.
+KNOWN_QUERIES = [
+    ('logs', {'guild_id': 0, 'type': 'signin'}, None),
+    ('logs', {'user_id': 0, 'guild_id': 0}, None),
+    ('logs', {'user_id': 0, 'guild_id': 0, 'type': 'signout', 'timestamp': {'$gte': 0}}, None),
+    ('sessions', {'guild_id': 0}, {'started_at': 1}),
+    ('sessions', {'guild_id': 0, 'user_id': 0}, None),
+    ('attendance_daily', {'guild_id': 0, 'day': {'$gte': 0, '$lt': 0}}, None),
+    ('voice_logs', {'user_id': 0, 'guild_id': 0}, None),
+    ('voice_open', {'guild_id': {'$in': [0]}}, None),
+    ('settings', {'guild_id': 0}, None),
+    ('settings', {'rev': {'$gt': 0}}, None),
+    ('keys', {'key': '', 'used': False}, None),
+    ('keys', {'guild_id': 0, 'used': True}, None),
+    ('keys', {'guild_id': 0, 'key': '', 'used': False}, None),
+    ('keys', {'used': True, 'expired_notified': False, 'expires_at': {'$lte': 0}}, None),
+    ('schedules', {'next_run': {'$lte': 0}}, None),
+    ('schedules', {'next_run': None}, None),
+    ('broadcasts', {'status': 'running'}, None),
+    ('salary', {'guild_id': 0, 'user_id': 0}, None),
+    ('salary', {'guild_id': 0}, None),
+]
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Register a data migration; versions are applied once, in ascending order."""
+    def deco(fn):
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return deco
+
+
+@migration(1, 'Seed open duty sessions from sign-in/out history')
+async def _seed_sessions():
+    opened = await sessions.rebuild()
+    return f"{opened} open sessions"
+
+
+@migration(2, 'Precompute next_run for scheduled reports')
+async def _schedule_next_run():
+    now = datetime.now(timezone.utc)
+    updated = 0
+    async for sched in db.schedules.find({'next_run': None}):
+        last_run = sched.get('last_run') or now - timedelta(minutes=2)
+        await db.schedules.update_one({'_id': sched['_id']}, {'$set': {'next_run': next_cron_run(sched['cron'], last_run)}})
+        updated += 1
+    return f"{updated} schedules"
+
+
+@migration(3, 'Backfill per-user daily attendance rollups')
+async def _backfill_rollups():
+    paired = await rollups.backfill()
+    return f"{paired} sessions"
+
+
+async def ensure_indexes():
+    total = time.perf_counter()
+    for name, models in INDEXES.items():
+        start = time.perf_counter()
+        try:
+            await db[name].create_indexes(models)
+        except Exception as e:
+            print(f"❌ Index build failed on {name}: {e}")
+            continue
+        print(f"🗂️ Indexes on {name} ready in {(time.perf_counter() - start) * 1000:.0f}ms")
+    print(f"🗂️ Index bootstrap took {(time.perf_counter() - total) * 1000:.0f}ms")
+
+
+async def apply_migrations():
+    state = await db.meta.find_one({'_id': 'schema_version'}) or {}
+    current = state.get('v', 0)
+    for version, description, fn in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version <= current:
+            continue
+        start = time.perf_counter()
+        result = await fn()
+        await db.meta.update_one({'_id': 'schema_version'}, {'$set': {'v': version}}, upsert=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"🧬 Migration {version} ({description}) applied in {elapsed:.0f}ms" + (f": {result}" if result else ""))
+        current = version
+
+
+async def run_migrations():
+    await ensure_indexes()
+    await apply_migrations()
+
+
+def _stages(plan):
+    yield plan.get('stage')
+    for key in ('inputStage', 'queryPlan'):
+        if key in plan:
+            yield from _stages(plan[key])
+    for child in plan.get('inputStages', []):
+        yield from _stages(child)
+
+
+async def explain_check():
+    """Return the KNOWN_QUERIES whose winning plan contains a COLLSCAN."""
+    offenders = []
+    for coll, flt, sort in KNOWN_QUERIES:
+        cmd = {'find': coll, 'filter': flt}
+        if sort:
+            cmd['sort'] = sort
+        res = await db.command({'explain': cmd, 'verbosity': 'queryPlanner'})
+        if 'COLLSCAN' in _stages(res['queryPlanner']['winningPlan']):
+            offenders.append((coll, flt, sort))
+    return offenders
+
+
+async def _main(argv):
+    await run_migrations()
+    if '--check' in argv:
+        offenders = await explain_check()
+        for coll, flt, sort in offenders:
+            print(f"❌ COLLSCAN: {coll}.find({flt})" + (f".sort({sort})" if sort else ""))
+        if offenders:
+            return 1
+        print(f"✅ All {len(KNOWN_QUERIES)} known queries use an index")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
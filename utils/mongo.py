@@ -1,7 +1,34 @@
 import os
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient
 from dotenv import load_dotenv
+from utils.metrics import MongoListener
 
 load_dotenv()
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["staffsuite"]
\ No newline at end of file
+
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# Pool size and timeouts are tunable per deployment; the defaults keep a slow
+# Mongo from holding an interaction past Discord's 3 second deadline.
+MONGO_OPTIONS = {
+    'maxPoolSize': _env_int('MONGO_MAX_POOL_SIZE', 50),
+    'minPoolSize': _env_int('MONGO_MIN_POOL_SIZE', 0),
+    'maxIdleTimeMS': _env_int('MONGO_MAX_IDLE_MS', 60_000),
+    'waitQueueTimeoutMS': _env_int('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2_000),
+    'serverSelectionTimeoutMS': _env_int('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5_000),
+    'connectTimeoutMS': _env_int('MONGO_CONNECT_TIMEOUT_MS', 5_000),
+    'socketTimeoutMS': _env_int('MONGO_SOCKET_TIMEOUT_MS', 10_000),
+}
+
+# AsyncMongoClient binds to the running loop on first use, so importing this
+# module at cog import time is safe. Every call is awaitable:
+#   await db.logs.find_one(...)
+#   await db.logs.find(...).to_list(None)
+#   await (await db.logs.aggregate(pipeline)).to_list(None)
+client = AsyncMongoClient(os.getenv("MONGO_URI"), event_listeners=[MongoListener()], **MONGO_OPTIONS)
+db = client["staffsuite"]
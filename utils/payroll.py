@@ -0,0 +1,76 @@
+"""Month-end payroll: salaries joined with measured duty hours.
+
+Hours come from one aggregation over the `attendance_daily` rollups (closed
+sign-in/out sessions from `logs`, split at midnight so month boundaries are
+exact), salaries from one query on `salary`. Pay for every salaried member
+is then computed at once with numpy:
+
+    hourly rate  monthly: salary / standard_hours    hourly: salary
+    base         monthly: salary * min(hours / standard_hours, 1), or salary without pro-rata
+                 hourly:  min(hours, standard_hours) * rate
+    overtime     max(hours - standard_hours, 0) * hourly rate * overtime_multiplier
+"""
+import csv
+import io
+from utils.mongo import db
+from utils import rollups
+
+STANDARD_HOURS = 160
+OVERTIME_MULTIPLIER = 1.5
+COLUMNS = ['user_id', 'name', 'pay_type', 'salary', 'hours', 'base_pay', 'overtime_hours', 'overtime_pay', 'total']
+
+
+async def run(guild_id, start, end, standard_hours=STANDARD_HOURS, overtime_multiplier=OVERTIME_MULTIPLIER, prorate=True):
+    """Pay for every salaried member over [start, end) days: {column: numpy array}, or None if nobody has a salary."""
+    import numpy as np  # slow to import; only payroll runs need it
+
+    salaries = await db.salary.find(
+        {'guild_id': guild_id}, {'_id': 0, 'user_id': 1, 'salary': 1, 'pay_type': 1}
+    ).to_list(None)
+    if not salaries:
+        return None
+    duty = await rollups.summarize(guild_id, start, end)  # sorted by user id
+
+    user_ids = np.fromiter((s['user_id'] for s in salaries), np.int64, len(salaries))
+    salary = np.fromiter((s['salary'] for s in salaries), np.float64, len(salaries))
+    hourly = np.fromiter((s.get('pay_type') == 'hourly' for s in salaries), bool, len(salaries))
+
+    # Left join on user id: members with a salary but no closed sessions worked 0 hours
+    hours = np.zeros(len(salaries))
+    if duty:
+        duty_ids = np.fromiter((d['_id'] for d in duty), np.int64, len(duty))
+        duty_hours = np.fromiter((d['seconds'] for d in duty), np.float64, len(duty)) / 3600
+        idx = np.minimum(np.searchsorted(duty_ids, user_ids), len(duty) - 1)
+        found = duty_ids[idx] == user_ids
+        hours[found] = duty_hours[idx[found]]
+
+    rate = np.where(hourly, salary, salary / standard_hours)
+    worked = np.minimum(hours, standard_hours)
+    monthly_base = salary * (worked / standard_hours) if prorate else salary
+    base = np.where(hourly, worked * rate, monthly_base)
+    overtime_hours = np.maximum(hours - standard_hours, 0)
+    overtime_pay = overtime_hours * rate * overtime_multiplier
+    return {
+        'user_id': user_ids,
+        'pay_type': np.where(hourly, 'hourly', 'monthly'),
+        'salary': salary,
+        'hours': hours.round(2),
+        'base_pay': base.round(2),
+        'overtime_hours': overtime_hours.round(2),
+        'overtime_pay': overtime_pay.round(2),
+        'total': (base + overtime_pay).round(2),
+    }
+
+
+def statement_csv(result, member_name=lambda user_id: ''):
+    """CSV bytes of a payroll run, highest total first."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    for i in result['total'].argsort()[::-1]:
+        user_id = int(result['user_id'][i])
+        writer.writerow([
+            user_id, member_name(user_id), result['pay_type'][i], f"{result['salary'][i]:g}",
+            *(f"{result[column][i]:.2f}" for column in COLUMNS[4:])
+        ])
+    return buf.getvalue().encode()
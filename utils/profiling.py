@@ -0,0 +1,108 @@
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SlowCalls:
+    """Per-name count, total and worst duration of commands and listeners since startup."""
+
+    def __init__(self):
+        self._stats = {}  # name -> [count, total seconds, max seconds]
+
+    def record(self, name, seconds):
+        entry = self._stats.get(name)
+        if entry is None:
+            self._stats[name] = [1, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def top(self, n=10):
+        """The `n` names with the worst single call: [(name, count, mean s, max s)]."""
+        ranked = sorted(self._stats.items(), key=lambda item: item[1][2], reverse=True)[:n]
+        return [(name, count, total / count, worst) for name, (count, total, worst) in ranked]
+
+
+class SamplingProfiler:
+    """Sample the event loop thread's stack every `interval` seconds from a helper thread.
+
+    Produces folded stacks ("frame;frame;frame count" per line), the input
+    format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None and frame.f_code.co_name == 'select' and frame.f_code.co_filename.endswith('selectors.py'):
+                # Loop waiting for I/O
+                self.samples['<idle>'] += 1
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def folded(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class ProfileSession:
+    """One `/profiler start` ... `/profiler stop` run, in cProfile or sampling mode.
+
+    Must be started and stopped on the event loop thread: cProfile only
+    profiles the thread that enables it, and the sampler watches that thread.
+    """
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.started = time.monotonic()
+        if mode == 'cprofile':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = SamplingProfiler(threading.get_ident())
+            self._sampler.start()
+
+    def stop(self, top=25):
+        """Stop and return (filename, file bytes, short text summary)."""
+        seconds = time.monotonic() - self.started
+        if self.mode == 'cprofile':
+            self._profile.disable()
+            out = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=out)
+            stats.sort_stats('cumulative').print_stats(top)
+            # Same bytes Stats.dump_stats writes, without a temp file
+            return 'profile.pstats', marshal.dumps(stats.stats), f"cProfile over {seconds:.1f}s\n" + out.getvalue()
+        self._sampler.stop()
+        samples = self._sampler.samples
+        leaves = Counter()
+        for stack, count in samples.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        total = sum(samples.values()) or 1
+        summary = f"{total} samples over {seconds:.1f}s; hottest frames:\n" + "\n".join(
+            f"{count / total:6.1%}  {frame}" for frame, count in leaves.most_common(top)
+        )
+        return 'profile.folded.txt', self._sampler.folded().encode(), summary
@@ -0,0 +1,78 @@
+from datetime import datetime, time, timedelta
+from pymongo import UpdateOne
+from utils.mongo import db
+from utils import sessions
+
+# Per-user, per-day attendance summaries:
+#   {'guild_id', 'user_id', 'day', 'sessions', 'seconds', 'first_seen', 'last_seen'}
+# `day` is midnight UTC (naive, like the timestamps in `logs`). A session that
+# crosses midnight contributes its seconds to each day it covers and counts
+# as one session on the day it started.
+
+
+def day_slices(start, end):
+    """Split [start, end) at UTC midnights into (day, slice_start, slice_end)."""
+    while start < end:
+        day = datetime.combine(start.date(), time.min)
+        cut = min(end, day + timedelta(days=1))
+        yield day, start, cut
+        start = cut
+
+
+def session_updates(guild_id, user_id, start, end):
+    ops = []
+    for i, (day, s, e) in enumerate(day_slices(start, end)):
+        ops.append(UpdateOne(
+            {'guild_id': guild_id, 'user_id': user_id, 'day': day},
+            {
+                '$inc': {'sessions': 1 if i == 0 else 0, 'seconds': (e - s).total_seconds()},
+                '$min': {'first_seen': s},
+                '$max': {'last_seen': e},
+            },
+            upsert=True
+        ))
+    return ops
+
+
+async def record_session(guild_id, user_id, start, end):
+    """Fold one closed duty session into the daily rollups."""
+    ops = session_updates(guild_id, user_id, start, end)
+    if ops:
+        await db.attendance_daily.bulk_write(ops, ordered=False)
+
+
+async def backfill(batch_size=1000):
+    """Rebuild the rollups from the raw sign-in/out history in `logs`."""
+    await db.attendance_daily.delete_many({})
+    cursor = db.logs.find(
+        {'type': {'$in': ['signin', 'signout']}},
+        {'guild_id': 1, 'user_id': 1, 'type': 1, 'timestamp': 1},
+        batch_size=batch_size
+    ).sort([('guild_id', 1), ('user_id', 1), ('timestamp', 1)])
+    ops, paired = [], 0
+    async for signin, signout in sessions.pair_events(cursor):
+        ops.extend(session_updates(signin['guild_id'], signin['user_id'], signin['timestamp'], signout['timestamp']))
+        paired += 1
+        if len(ops) >= batch_size:
+            await db.attendance_daily.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        await db.attendance_daily.bulk_write(ops, ordered=False)
+    return paired
+
+
+async def summarize(guild_id, start=None, end=None):
+    """Per-user totals over [start, end) days: [{'_id': user_id, 'sessions', 'seconds'}]."""
+    match = {'guild_id': guild_id}
+    if start or end:
+        match['day'] = {}
+        if start:
+            match['day']['$gte'] = start
+        if end:
+            match['day']['$lt'] = end
+    pipeline = [
+        {'$match': match},
+        {'$group': {'_id': '$user_id', 'sessions': {'$sum': '$sessions'}, 'seconds': {'$sum': '$seconds'}}},
+        {'$sort': {'_id': 1}},
+    ]
+    return await (await db.attendance_daily.aggregate(pipeline)).to_list(None)
@@ -0,0 +1,70 @@
+from pymongo.errors import DuplicateKeyError
+from utils.mongo import db
+
+# One document per staff member currently on duty:
+#   {'guild_id', 'user_id', 'started_at'}
+# The unique (guild_id, user_id) index makes sign-in atomic, and the board is a
+# single indexed read whose size is the number of people signed in right now.
+# Indexes are declared in utils/migrations.py.
+
+
+async def open_session(guild_id, user_id, started_at):
+    """Open a duty session. Returns False if the user is already signed in."""
+    try:
+        await db.sessions.insert_one({'guild_id': guild_id, 'user_id': user_id, 'started_at': started_at})
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+async def close_session(guild_id, user_id):
+    """Close and return the user's open session, or None if they were not signed in."""
+    return await db.sessions.find_one_and_delete({'guild_id': guild_id, 'user_id': user_id})
+
+
+async def present(guild_id):
+    """Open sessions for a guild, oldest first."""
+    return await db.sessions.find({'guild_id': guild_id}, {'_id': 0}).sort('started_at', 1).to_list(None)
+
+
+async def rebuild():
+    """Rebuild open sessions from the sign-in/out history in `logs`.
+
+    A user is on duty when their latest attendance event is a sign-in. Run once
+    by migration 1 to seed the collection from data written before sessions
+    were tracked.
+    """
+    pipeline = [
+        {'$match': {'type': {'$in': ['signin', 'signout']}}},
+        {'$sort': {'timestamp': 1}},
+        {'$group': {
+            '_id': {'guild_id': '$guild_id', 'user_id': '$user_id'},
+            'type': {'$last': '$type'},
+            'timestamp': {'$last': '$timestamp'},
+        }},
+        {'$match': {'type': 'signin'}},
+    ]
+    opened = 0
+    async for row in await db.logs.aggregate(pipeline, allowDiskUse=True):
+        if await open_session(row['_id']['guild_id'], row['_id']['user_id'], row['timestamp']):
+            opened += 1
+    return opened
+
+
+async def pair_events(cursor):
+    """Pair sign-in/out events into closed sessions.
+
+    `cursor` must yield attendance events sorted by (guild_id, user_id,
+    timestamp). Yields (signin, signout) event pairs one at a time, so memory
+    stays constant however long the history is. A repeated sign-in while a
+    session is open and a sign-out without one are ignored.
+    """
+    open_event = None
+    async for event in cursor:
+        if open_event and (open_event['guild_id'], open_event['user_id']) != (event['guild_id'], event['user_id']):
+            open_event = None
+        if event['type'] == 'signin':
+            open_event = open_event or event
+        elif open_event:
+            yield open_event, event
+            open_event = None
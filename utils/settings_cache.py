@@ -0,0 +1,162 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure, PyMongoError
+from utils.mongo import db
+
+_MISSING = object()
+
+
+class SettingsCache:
+    """Bounded LRU cache of per-guild settings documents.
+
+    Reads are served from memory; writes go through `update`, which writes to
+    Mongo first and then refreshes the cached copy. Every write also stamps the
+    document with a monotonically increasing `rev` so other processes can
+    invalidate: a change stream is used when the deployment supports one,
+    otherwise the cache polls for documents with a newer `rev`. A revision is
+    taken before its write lands, so concurrent writers can become visible out
+    of order; each poll re-reads the revisions of the last `rev_overlap`
+    seconds and skips the ones it has already seen. Entries older
+    than `max_age` are reloaded regardless, as a backstop for edits made
+    outside the bot. Returned documents are shared; treat them as read-only.
+    """
+
+    def __init__(self, collection, max_size=2048, max_age=600, poll_interval=5, rev_overlap=30):
+        self.collection = collection
+        self.max_size = max_size
+        self.max_age = max_age
+        self.poll_interval = poll_interval
+        self.rev_overlap = rev_overlap
+        self._entries = OrderedDict()  # guild_id -> (doc or None, loaded_at)
+        self._last_rev = 0
+        self._marks = deque()  # (poll time, _last_rev after it), oldest first
+        self._seen = set()     # revisions above the poll floor that were already invalidated
+        self._task = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get(self, guild_id):
+        entry = self._entries.get(guild_id, _MISSING)
+        if entry is not _MISSING and time.monotonic() - entry[1] < self.max_age:
+            self._entries.move_to_end(guild_id)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        doc = await self.collection.find_one({'guild_id': guild_id})
+        self._store(guild_id, doc)
+        return doc
+
+    async def update(self, guild_id, fields):
+        """Write-through `$set` of `fields`; returns the updated document."""
+        rev = await db.meta.find_one_and_update(
+            {'_id': 'settings_rev'}, {'$inc': {'v': 1}},
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+        doc = await self.collection.find_one_and_update(
+            {'guild_id': guild_id},
+            {'$set': {**fields, 'rev': rev['v']}},
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+        self._store(guild_id, doc)
+        return doc
+
+    def invalidate(self, guild_id=None):
+        if guild_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(guild_id, None)
+        self.invalidations += 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 3) if total else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+    def _store(self, guild_id, doc):
+        self._entries[guild_id] = (doc, time.monotonic())
+        self._entries.move_to_end(guild_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._invalidate_loop())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _invalidate_loop(self):
+        attempt = 0
+        while True:
+            try:
+                rev = await db.meta.find_one({'_id': 'settings_rev'})
+                break
+            except PyMongoError as e:
+                attempt += 1
+                delay = min(60, 2 ** min(attempt, 6))
+                print(f"[Settings] Reading settings revision failed, retry #{attempt} in {delay}s: {e}")
+                await asyncio.sleep(delay)
+        self._last_rev = rev['v'] if rev else 0
+        self._marks.append((time.monotonic(), self._last_rev))
+        try:
+            await self._watch()
+        except OperationFailure:
+            # Standalone servers have no change streams; poll the rev counter instead
+            print("[Settings] Change streams unavailable, polling for settings revisions")
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self._poll()
+            except PyMongoError as e:
+                print(f"[Settings] Revision poll failed: {e}")
+
+    async def _watch(self):
+        while True:
+            try:
+                async with await self.collection.watch(full_document='updateLookup') as stream:
+                    async for change in stream:
+                        doc = change.get('fullDocument')
+                        # Deletes carry no guild_id, so drop everything in that case
+                        self.invalidate(doc['guild_id'] if doc else None)
+            except OperationFailure:
+                raise
+            except PyMongoError as e:
+                print(f"[Settings] Change stream interrupted: {e}")
+                self.invalidate()
+                await asyncio.sleep(self.poll_interval)
+
+    async def _poll(self):
+        now = time.monotonic()
+        # Floor: the newest revision already seen rev_overlap seconds ago
+        while len(self._marks) > 1 and now - self._marks[1][0] >= self.rev_overlap:
+            self._marks.popleft()
+        floor = self._marks[0][1] if self._marks else self._last_rev
+        self._seen = {rev for rev in self._seen if rev > floor}
+        async for doc in self.collection.find({'rev': {'$gt': floor}}, {'guild_id': 1, 'rev': 1}):
+            if doc['rev'] in self._seen:
+                continue
+            self._seen.add(doc['rev'])
+            self.invalidate(doc['guild_id'])
+            self._last_rev = max(self._last_rev, doc['rev'])
+        self._marks.append((now, self._last_rev))
+
+
+settings_cache = SettingsCache(
+    db.settings,
+    max_size=int(os.getenv('SETTINGS_CACHE_SIZE', 2048)),
+    max_age=int(os.getenv('SETTINGS_CACHE_MAX_AGE', 600)),
+)
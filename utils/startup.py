@@ -0,0 +1,95 @@
+"""Startup pipeline: phase timings, concurrent cog loading and fingerprint-gated command sync.
+
+Command sync is rate limited by Discord, so the command tree is fingerprinted
+and only synced when the fingerprint differs from the one stored in
+`meta` after the last successful sync.
+"""
+import asyncio
+import hashlib
+import importlib
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from utils.mongo import db
+from utils import metrics
+
+
+class StartupTimer:
+    """Wall-clock time of each startup phase, plus milestones measured from process start."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}  # name -> seconds, in the order they finished
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        self.phases[name] = seconds
+        metrics.STARTUP_SECONDS.labels(name).set(seconds)
+
+    def milestone(self, name):
+        """Record `name` as the time since process start, once."""
+        if name not in self.phases:
+            self.record(name, time.perf_counter() - self.started)
+        return self.phases[name]
+
+    def report(self):
+        return " | ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+
+
+async def load_cogs(bot, names, timer=None):
+    """Import every cog module on worker threads, then run their setups concurrently.
+
+    The imports pull each cog's dependencies into sys.modules in parallel, so
+    load_extension only re-executes the cog module itself. One failing cog is
+    reported and skipped without holding up the rest.
+    """
+    async def load(name):
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(importlib.import_module, name)
+            await bot.load_extension(name)
+        except Exception as e:
+            print(f"❌ Failed to load {name}: {e}")
+            return False
+        seconds = time.perf_counter() - start
+        if timer:
+            timer.record(f"cog {name.rsplit('.', 1)[-1]}", seconds)
+        print(f"✅ Loaded {name} ({seconds * 1000:.0f} ms)")
+        return True
+
+    results = await asyncio.gather(*(load(name) for name in names))
+    return sum(results)
+
+
+def tree_fingerprint(bot, guild=None):
+    """sha256 of the commands a sync of `guild` (None: global) would upload, independent of load order."""
+    payload = sorted(
+        (command.to_dict(bot.tree) for command in bot.tree.get_commands(guild=guild)),
+        key=lambda c: (c.get('type', 1), c['name'])
+    )
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+async def sync_commands(bot, guild=None, force=False):
+    """Sync the command tree for `guild` (None: global) unless it is unchanged since the last sync.
+
+    Returns the synced commands, or None when the sync was skipped.
+    """
+    scope = f"guild:{guild.id}" if guild else "global"
+    key = {'_id': f"command_tree:{bot.application_id}:{scope}"}
+    fingerprint = tree_fingerprint(bot, guild)
+    if not force:
+        stored = await db.meta.find_one(key) or {}
+        if stored.get('hash') == fingerprint:
+            return None
+    synced = await bot.tree.sync(guild=guild)
+    await db.meta.update_one(key, {'$set': {'hash': fingerprint, 'synced_at': datetime.now(timezone.utc)}}, upsert=True)
+    return synced
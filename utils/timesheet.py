@@ -0,0 +1,144 @@
+"""Streaming timesheet export of duty sessions.
+
+Sign-in/out events are read with one server-side cursor sorted by
+(user_id, timestamp) on the guild's `guild_user_ts` index, paired into
+sessions as they stream past and written straight into gzip files, so memory
+use does not depend on how much history a guild has. Output rolls over into
+numbered parts once a part reaches `max_bytes` compressed, to fit Discord's
+upload limit.
+
+CLI:
+    python -m utils.timesheet --guild 123 --month 2024-05 [--format jsonl] [--out DIR]
+"""
+import asyncio
+import csv
+import gzip
+import json
+import os
+import sys
+import zlib
+from datetime import datetime, timedelta
+from utils.mongo import db
+from utils import sessions
+
+# Sign-outs this long after the range still close sessions that started inside it
+SESSION_SLACK = timedelta(days=1)
+# Compressed output is synced this often so part sizes can be measured exactly
+SYNC_EVERY = 64 * 1024
+FIELDS = ['user_id', 'member', 'start', 'end', 'duration_seconds', 'duration', 'report']
+
+
+def month_range(month):
+    """'2024-05' -> (2024-05-01, 2024-06-01) as naive UTC datetimes."""
+    start = datetime.strptime(month, '%Y-%m')
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start, end
+
+
+class _RollingGzipWriter:
+    """File-like sink that starts a new .gz part when the current one gets too big."""
+
+    def __init__(self, directory, stem, ext, max_bytes=None, header=None):
+        self.directory, self.stem, self.ext = directory, stem, ext
+        self.max_bytes = max_bytes
+        self.header = header
+        self.paths = []
+        self._raw = self._gz = None
+        self._unsynced = 0
+
+    def _open(self):
+        path = os.path.join(self.directory, f"{self.stem}-part{len(self.paths) + 1}.{self.ext}.gz")
+        self.paths.append(path)
+        self._raw = open(path, 'wb')
+        self._gz = gzip.GzipFile(fileobj=self._raw, mode='wb')
+        self._unsynced = 0
+        if self.header:
+            self._gz.write(self.header.encode())
+
+    def write(self, text):
+        # Anything not yet synced compresses to at most about SYNC_EVERY bytes
+        if self._gz is None or (self.max_bytes and self._raw.tell() + SYNC_EVERY >= self.max_bytes):
+            self._close_part()
+            self._open()
+        data = text.encode()
+        self._gz.write(data)
+        self._unsynced += len(data)
+        if self._unsynced >= SYNC_EVERY:
+            self._gz.flush(zlib.Z_SYNC_FLUSH)
+            self._unsynced = 0
+
+    def _close_part(self):
+        if self._gz is not None:
+            self._gz.close()
+            self._raw.close()
+            self._gz = self._raw = None
+
+    def close(self):
+        self._close_part()
+        return self.paths
+
+
+def _row(signin, signout, member_name):
+    seconds = int((signout['timestamp'] - signin['timestamp']).total_seconds())
+    hours, rem = divmod(seconds, 3600)
+    return {
+        'user_id': signin['user_id'],
+        'member': member_name(signin['user_id']) if member_name else '',
+        'start': signin['timestamp'].isoformat() + 'Z',
+        'end': signout['timestamp'].isoformat() + 'Z',
+        'duration_seconds': seconds,
+        'duration': f"{hours}:{rem // 60:02d}:{rem % 60:02d}",
+        'report': signout.get('report', ''),
+    }
+
+
+async def export(guild_id, start, end, directory, fmt='csv', max_bytes=None, member_name=None):
+    """Write sessions that started in [start, end) to gzip parts in `directory`.
+
+    Returns (paths, session_count). `member_name(user_id)` may supply a display
+    name column.
+    """
+    cursor = db.logs.find(
+        {'guild_id': guild_id, 'type': {'$in': ['signin', 'signout']}, 'timestamp': {'$gte': start, '$lt': end + SESSION_SLACK}},
+        {'_id': 0, 'guild_id': 1, 'user_id': 1, 'type': 1, 'timestamp': 1, 'report': 1},
+        batch_size=2000
+    ).sort([('user_id', 1), ('timestamp', 1)])
+    stem = f"timesheet-{guild_id}-{start:%Y-%m-%d}"
+    if fmt == 'jsonl':
+        out = _RollingGzipWriter(directory, stem, 'jsonl', max_bytes)
+        write = lambda row: out.write(json.dumps(row, ensure_ascii=False) + '\n')
+    else:
+        out = _RollingGzipWriter(directory, stem, 'csv', max_bytes, header=','.join(FIELDS) + '\r\n')
+        writer = csv.DictWriter(out, FIELDS)
+        write = writer.writerow
+    count = 0
+    try:
+        async for signin, signout in sessions.pair_events(cursor):
+            if signin['timestamp'] >= end:
+                continue
+            write(_row(signin, signout, member_name))
+            count += 1
+    finally:
+        paths = out.close()
+    return paths, count
+
+
+async def _main(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Export duty sessions as a gzip timesheet.')
+    parser.add_argument('--guild', type=int, required=True)
+    parser.add_argument('--month', required=True, help='YYYY-MM')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+    parser.add_argument('--out', default='.', help='Output directory')
+    parser.add_argument('--split-mb', type=float, default=None, help='Start a new part after this many MB')
+    args = parser.parse_args(argv)
+    start, end = month_range(args.month)
+    max_bytes = int(args.split_mb * 1024 * 1024) if args.split_mb else None
+    paths, count = await export(args.guild, start, end, args.out, args.format, max_bytes)
+    print(f"✅ Exported {count} sessions to {', '.join(paths) or 'nothing'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,164 @@
+"""Voice sessions: one `voice_logs` document per join-to-leave period.
+
+Open sessions live in memory. Moves between channels and mute, deafen or
+stream toggles only touch the in-memory entry, so a session costs a single
+(write-behind) insert when it closes however much it churned.
+
+For restart recovery the open set is checkpointed into `voice_open` every
+CHECKPOINT_INTERVAL seconds as a diff, so sessions shorter than the interval
+never reach it, followed by a heartbeat in `meta`. On ready, `reconcile()`
+compares the sessions it knows about with the voice states the gateway
+reports. Sessions still live continue. Sessions whose member left while the
+bot was down are closed at the last heartbeat. Members found in voice
+without a session are opened now. Estimated times are flagged `approx`.
+
+    voice_logs: {'guild_id', 'user_id', 'channel_id', 'started_at', 'ended_at', 'seconds', 'moves'[, 'approx']}
+    voice_open: {'guild_id', 'user_id', 'channel_id', 'started_at', 'approx', 'cluster'}
+
+`channel_id` is the channel the session started in. Times are naive UTC,
+like the timestamps in `logs`.
+"""
+import os
+from datetime import datetime
+from pymongo import DeleteOne, UpdateOne
+from utils.mongo import db
+from utils.writebehind import write_behind
+from utils import cluster
+
+CHECKPOINT_INTERVAL = int(os.getenv('VOICE_CHECKPOINT_INTERVAL', 60))
+CLUSTER = cluster.CLUSTER_ID or 0
+HEARTBEAT_ID = 'voice_heartbeat'  # meta doc: {'at': {cluster: last checkpoint}}
+
+
+class VoiceSession:
+    __slots__ = ('started_at', 'channel_id', 'moves', 'approx')
+
+    def __init__(self, started_at, channel_id, approx=False):
+        self.started_at = started_at
+        self.channel_id = channel_id
+        self.moves = 0
+        self.approx = approx
+
+
+class VoiceTracker:
+    def __init__(self):
+        self.sessions = {}     # (guild_id, user_id) -> VoiceSession
+        self._persisted = {}   # (guild_id, user_id) -> started_at of the copy in voice_open
+        self._dirty = set()    # keys whose voice_open copy may be out of date
+        self._adopted = False
+        self.closed = 0
+        self.events = 0
+        self.checkpoint_writes = 0
+
+    def join(self, guild_id, user_id, channel_id, now=None, approx=False):
+        self.events += 1
+        key = (guild_id, user_id)
+        if key in self.sessions:
+            # Missed the leave; keep the running session
+            self.sessions[key].moves += 1
+            return
+        self.sessions[key] = VoiceSession(now or datetime.utcnow(), channel_id, approx)
+        self._dirty.add(key)
+
+    def move(self, guild_id, user_id, channel_id):
+        session = self.sessions.get((guild_id, user_id))
+        if session is None:
+            # Missed the join (e.g. it happened during a reconnect)
+            return self.join(guild_id, user_id, channel_id, approx=True)
+        self.events += 1
+        session.moves += 1
+
+    def leave(self, guild_id, user_id, now=None, approx=False):
+        """Close the session and queue its voice_logs document; returns it, or None if there was none."""
+        self.events += 1
+        key = (guild_id, user_id)
+        session = self.sessions.pop(key, None)
+        if session is None:
+            return None
+        self._dirty.add(key)
+        ended_at = max(now or datetime.utcnow(), session.started_at)
+        doc = {
+            'guild_id': guild_id,
+            'user_id': user_id,
+            'channel_id': session.channel_id,
+            'started_at': session.started_at,
+            'ended_at': ended_at,
+            'seconds': (ended_at - session.started_at).total_seconds(),
+            'moves': session.moves,
+        }
+        if session.approx or approx:
+            doc['approx'] = True
+        write_behind.insert('voice_logs', doc)
+        self.closed += 1
+        return doc
+
+    async def checkpoint(self):
+        """Bring voice_open in line with the open sessions and record a heartbeat."""
+        if not self._adopted:
+            # The heartbeat in meta is the previous process's loss time until reconcile() has read it
+            return
+        keys, self._dirty = self._dirty, set()
+        ops, persisted = [], {}
+        for key in keys:
+            session = self.sessions.get(key)
+            if session and self._persisted.get(key) != session.started_at:
+                ops.append(UpdateOne({'guild_id': key[0], 'user_id': key[1]}, {'$set': {
+                    'channel_id': session.channel_id, 'started_at': session.started_at,
+                    'approx': session.approx, 'cluster': CLUSTER,
+                }}, upsert=True))
+                persisted[key] = session.started_at
+            elif session is None and key in self._persisted:
+                ops.append(DeleteOne({'guild_id': key[0], 'user_id': key[1]}))
+                persisted[key] = None
+        try:
+            if ops:
+                await db.voice_open.bulk_write(ops, ordered=False)
+            await db.meta.update_one({'_id': HEARTBEAT_ID}, {'$set': {f'at.{CLUSTER}': datetime.utcnow()}}, upsert=True)
+        except Exception:
+            self._dirty |= keys
+            raise
+        for key, started_at in persisted.items():
+            if started_at is None:
+                self._persisted.pop(key, None)
+            else:
+                self._persisted[key] = started_at
+        self.checkpoint_writes += len(ops)
+
+    async def reconcile(self, voice_states):
+        """Match open sessions with the gateway's view: {guild_id: {user_id: channel_id}} for available guilds.
+
+        Returns (sessions closed, sessions opened).
+        """
+        now = datetime.utcnow()
+        lost_at = {}
+        if not self._adopted:
+            # First ready of this process: adopt what the previous one checkpointed
+            self._adopted = True
+            heartbeats = (await db.meta.find_one({'_id': HEARTBEAT_ID}) or {}).get('at', {})
+            async for doc in db.voice_open.find({'guild_id': {'$in': list(voice_states)}}):
+                key = (doc['guild_id'], doc['user_id'])
+                self._persisted[key] = doc['started_at']
+                if key not in self.sessions:
+                    self.sessions[key] = VoiceSession(doc['started_at'], doc['channel_id'], doc.get('approx', False))
+                    lost_at[key] = heartbeats.get(str(doc.get('cluster', 0)), now)
+
+        closed = opened = 0
+        gone = [key for key in self.sessions if key[0] in voice_states and key[1] not in voice_states[key[0]]]
+        for key in gone:
+            self.leave(*key, now=lost_at.get(key, now), approx=True)
+            closed += 1
+        for guild_id, states in voice_states.items():
+            for user_id, channel_id in states.items():
+                if (guild_id, user_id) not in self.sessions:
+                    self.join(guild_id, user_id, channel_id, now=now, approx=True)
+                    opened += 1
+        return closed, opened
+
+    def stats(self):
+        return {
+            'open_sessions': len(self.sessions),
+            'closed_sessions': self.closed,
+            'events': self.events,
+            'checkpoint_writes': self.checkpoint_writes,
+            'pending_checkpoint': len(self._dirty),
+        }
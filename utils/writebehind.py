@@ -0,0 +1,187 @@
+import asyncio
+import glob
+import os
+import time
+import bson
+from pymongo.errors import BulkWriteError, PyMongoError
+from utils.mongo import db
+
+
+class WriteBehind:
+    """Buffer inserts per collection and write them in batches.
+
+    `insert()` assigns the document its `_id` and returns immediately; a
+    background task writes each collection's buffer with
+    `insert_many(ordered=False)` once it holds `max_batch` documents or every
+    `flush_interval` seconds. If Mongo is unavailable, batches go back to the
+    front of the buffer and are retried; past `max_backlog` the oldest
+    documents are dropped and counted.
+
+    With `spool_path` set, every insert is also appended to a BSON spool
+    file before it is acknowledged, so events buffered at a crash are
+    replayed on the next start. Replays are idempotent because the `_id`s
+    are fixed at enqueue time.
+    """
+
+    def __init__(self, max_batch=500, flush_interval=1.0, max_backlog=50_000, spool_path=None):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_backlog = max_backlog
+        self.spool_path = spool_path
+        self._buffers = {}   # collection name -> list of docs
+        self._spool = None
+        self._rotated = []   # spool files whose documents are all still buffered or in flight
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = None
+        self.inserted = 0
+        self.batches = 0
+        self.dropped = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def insert(self, collection, doc):
+        doc.setdefault('_id', bson.ObjectId())
+        if self._spool:
+            self._spool.write(bson.encode({'c': collection, 'd': doc}))
+            self._spool.flush()
+        buffer = self._buffers.setdefault(collection, [])
+        buffer.append(doc)
+        if len(buffer) >= self.max_batch:
+            self._wake.set()
+        return doc['_id']
+
+    def backlog(self):
+        return sum(len(b) for b in self._buffers.values())
+
+    async def start(self):
+        if self.spool_path:
+            await self._replay()
+            self._spool = open(self.spool_path, 'ab')
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the background task and flush everything still buffered."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        if self._spool:
+            self._spool.close()
+            self._spool = None
+            if not self.backlog() and os.path.exists(self.spool_path):
+                os.remove(self.spool_path)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            if not self.backlog():
+                return
+            # Swap out every buffer and rotate the spool together, so the rotated
+            # file holds exactly what this flush (plus earlier failed ones) owns
+            pending, self._buffers = self._buffers, {}
+            if self._spool and self._spool.tell():
+                self._spool.close()
+                rotated = f"{self.spool_path}.{time.time_ns()}"
+                os.replace(self.spool_path, rotated)
+                self._rotated.append(rotated)
+                self._spool = open(self.spool_path, 'ab')
+            failed = False
+            for name, docs in pending.items():
+                for i in range(0, len(docs), self.max_batch):
+                    batch = docs[i:i + self.max_batch]
+                    if not await self._write(name, batch):
+                        failed = True
+                        self._requeue(name, docs[i:])
+                        break
+            if not failed:
+                for path in self._rotated:
+                    os.remove(path)
+                self._rotated = []
+
+    async def _write(self, name, batch):
+        start = time.perf_counter()
+        try:
+            await db[name].insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Duplicate _ids come from replaying a spool; anything else is a bad document
+            bad = [err for err in e.details.get('writeErrors', []) if err.get('code') != 11000]
+            if bad:
+                self.dropped += len(bad)
+                print(f"[WriteBehind] {len(bad)} documents rejected by {name}: {bad[0].get('errmsg')}")
+        except PyMongoError as e:
+            print(f"[WriteBehind] Flush of {len(batch)} documents to {name} failed, will retry: {e}")
+            return False
+        elapsed = (time.perf_counter() - start) * 1000
+        self.inserted += len(batch)
+        self.batches += 1
+        self.last_batch_size = len(batch)
+        self.last_flush_ms = elapsed
+        self.max_flush_ms = max(self.max_flush_ms, elapsed)
+        return True
+
+    def _requeue(self, name, docs):
+        self._buffers.setdefault(name, [])[:0] = docs
+        overflow = self.backlog() - self.max_backlog
+        # Oldest first: the front of the requeued buffer, then the fronts of the largest other buffers
+        others = sorted((n for n in self._buffers if n != name), key=lambda n: len(self._buffers[n]), reverse=True)
+        for victim in [name, *others]:
+            if overflow <= 0:
+                break
+            buffer = self._buffers[victim]
+            removed = min(overflow, len(buffer))
+            del buffer[:removed]
+            overflow -= removed
+            self.dropped += removed
+            if removed:
+                print(f"[WriteBehind] Backlog full, dropped {removed} oldest {victim} documents")
+
+    async def _replay(self):
+        paths = sorted(glob.glob(f"{self.spool_path}.*"))
+        if os.path.exists(self.spool_path):
+            paths.append(self.spool_path)
+        replayed = 0
+        for path in paths:
+            with open(path, 'rb') as f:
+                for record in bson.decode_file_iter(f):
+                    self._buffers.setdefault(record['c'], []).append(record['d'])
+                    replayed += 1
+            self._rotated.append(path if path != self.spool_path else self._rotate_active())
+        if replayed:
+            print(f"[WriteBehind] Replaying {replayed} spooled documents")
+            await self.flush()
+
+    def _rotate_active(self):
+        rotated = f"{self.spool_path}.{time.time_ns()}"
+        os.replace(self.spool_path, rotated)
+        return rotated
+
+    def stats(self):
+        return {
+            'backlog': self.backlog(),
+            'inserted': self.inserted,
+            'batches': self.batches,
+            'last_batch_size': self.last_batch_size,
+            'last_flush_ms': round(self.last_flush_ms, 1),
+            'max_flush_ms': round(self.max_flush_ms, 1),
+            'dropped': self.dropped,
+            'spooled_files': len(self._rotated),
+        }
+
+
+write_behind = WriteBehind(
+    max_batch=int(os.getenv('WRITE_BEHIND_BATCH', 500)),
+    flush_interval=float(os.getenv('WRITE_BEHIND_INTERVAL', 1.0)),
+    spool_path=os.getenv('WRITE_BEHIND_SPOOL') or None,
+)